@@ -0,0 +1,144 @@
+"""
+Import-time benchmark for the package and the CLI entry point.
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --repeat 20 --json imports.json
+    python -m benchmarks.imports --baseline imports.json --tolerance 0.25
+
+Every measurement runs in a fresh interpreter, using `-X importtime` for the
+cumulative import cost of each module and plain wall time for `--help`
+(interpreter start-up included). Also lists which heavy third-party modules
+each import drags in. With --baseline, exits non-zero if any median got slower
+by more than --tolerance compared to a previous --json run.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+MODULES = [
+    "fable_to_goodreads.cli",
+    "fable_to_goodreads.parsing",
+    "fable_to_goodreads.exporter",
+    "fable_to_goodreads.replay",
+    "fable_to_goodreads.pipeline",
+    "fable_to_goodreads.client",
+]
+
+HEAVY = ("rich", "httpx", "pydantic", "playwright", "dotenv", "asyncio")
+
+
+def _env() -> Dict[str, str]:
+    # Make the checkout importable without installing it
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (src, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def import_us(module: str, env: Dict[str, str]) -> Optional[int]:
+    """Cumulative import time of `module` in microseconds, or None if it failed to import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        return None
+    for line in reversed(proc.stderr.splitlines()):
+        # "import time:   self [us] |  cumulative | imported package"
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return None
+
+
+def heavy_modules(module: str, env: Dict[str, str]) -> List[str]:
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    return proc.stdout.split() if proc.returncode == 0 else []
+
+
+def help_seconds(env: Dict[str, str]) -> Optional[float]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "fable_to_goodreads.cli", "--help"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+    seconds = time.perf_counter() - start
+    return seconds if proc.returncode == 0 else None
+
+
+def run(repeat: int) -> List[Dict[str, Any]]:
+    env = _env()
+    results = []
+    for module in MODULES:
+        samples = [import_us(module, env) for _ in range(repeat)]
+        ok = [s / 1000 for s in samples if s is not None]
+        results.append({
+            "stage": f"import:{module}",
+            "median_ms": statistics.median(ok) if ok else None,
+            "min_ms": min(ok) if ok else None,
+            "loads": heavy_modules(module, env) if ok else [],
+        })
+    samples = [help_seconds(env) for _ in range(repeat)]
+    ok = [s * 1000 for s in samples if s is not None]
+    results.append({
+        "stage": "cli:--help",
+        "median_ms": statistics.median(ok) if ok else None,
+        "min_ms": min(ok) if ok else None,
+        "loads": [],
+    })
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["stage"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get(r["stage"])
+        if not base or not base.get("median_ms") or r["median_ms"] is None:
+            continue
+        ratio = r["median_ms"] / base["median_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{r['stage']}: {ratio:.0%} of baseline time")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters per measurement")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a previous --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(max(1, args.repeat))
+
+    def ms(value: Optional[float]) -> str:
+        return "failed" if value is None else f"{value:.1f}"
+
+    print(f"{'stage':<40}{'median ms':>12}{'min ms':>10}  loads")
+    for r in results:
+        print(f"{r['stage']:<40}{ms(r['median_ms']):>12}{ms(r['min_ms']):>10}  {' '.join(r['loads'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+End-to-end benchmark against a synthetic library served by a mock transport.
+
+    python -m benchmarks.run --books 5000 --lists 8 --latency 0.05
+    python -m benchmarks.run --json results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.25
+
+Reports throughput for each stage: fetch, fetch against a warm HTTP cache, parse (into pydantic models
+and into the compact library), cover downloads (cold and cached), every Exporter sink and a repeat export
+of an unchanged library. With --baseline, exits non-zero if any stage's throughput fell by more than
+--tolerance compared to a previous --json run.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from fable_to_goodreads.covers import CoverDownloader, CoverStore, cover_url
+from fable_to_goodreads.exporter import EXPORT_FORMATS, Exporter
+from fable_to_goodreads.library import parse_library
+from fable_to_goodreads.parsing import merge_list_items, parse_books
+from fable_to_goodreads.scheduler import CrawlScheduler
+
+from fable_to_goodreads.client import FableClient
+
+from .synthetic import MockFableTransport, SyntheticLibrary, make_client
+
+
+async def fetch(library: SyntheticLibrary, transport: MockFableTransport, concurrency: int, **client_kwargs):
+    async with make_client(library, transport, **client_kwargs) as client:
+        scheduler = CrawlScheduler(concurrency)
+        reviews_task = scheduler.spawn(client.fetch_reviews())
+        lists = await scheduler.run(client.fetch_lists())
+        pages = await scheduler.gather(
+            client.fetch_books_from_list(lst["id"], lst.get("name", "Unknown")) for lst in lists
+        )
+        reviews = await reviews_task
+    return reviews, [item for items in pages for item in items]
+
+
+async def fetch_covers(urls: List[str], transport: MockFableTransport, covers_dir: str, concurrency: int):
+    async with FableClient.make_pool(max_connections=concurrency, transport=transport) as pool:
+        downloader = CoverDownloader(pool, CoverStore(covers_dir), concurrency)
+        return await downloader.download(urls)
+
+
+def retained_bytes(fn) -> int:
+    """Memory still allocated by fn's result once it returns."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        size = tracemalloc.get_traced_memory()[0]
+        del result
+    finally:
+        tracemalloc.stop()
+    return size
+
+
+def timed(name: str, items: int, fn) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    return {
+        "stage": name,
+        "seconds": seconds,
+        "items": items,
+        "items_per_sec": items / seconds if seconds else float("inf"),
+        "_result": result,
+    }
+
+
+def run(args) -> List[Dict[str, Any]]:
+    library = SyntheticLibrary(
+        books=args.books, lists=args.lists, overlap=args.overlap,
+        description_words=args.description_words, seed=args.seed,
+    )
+    transport = MockFableTransport(
+        library, latency=args.latency, throttle_every=args.throttle_every, retry_after=args.retry_after
+    )
+    results = []
+
+    r = timed("fetch", library.item_count, lambda: asyncio.run(fetch(library, transport, args.concurrency)))
+    reviews, items = r.pop("_result")
+    r["requests"] = transport.requests
+    r["throttled"] = transport.throttled
+    results.append(r)
+
+    # A repeat run against a warm HTTP cache, where every page revalidates as a 304
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = f"{cache_dir}/http_cache.db"
+        asyncio.run(fetch(library, transport, args.concurrency, cache_path=cache_path))
+        requests, not_modified = transport.requests, transport.not_modified
+        r = timed("fetch:revalidate", library.item_count,
+                  lambda: asyncio.run(fetch(library, transport, args.concurrency, cache_path=cache_path)))
+        r.pop("_result")
+        r["requests"] = transport.requests - requests
+        r["not_modified"] = transport.not_modified - not_modified
+        results.append(r)
+
+    unique = merge_list_items(items)
+
+    r = timed("parse:books", len(unique), lambda: parse_books(unique, reviews))
+    r.pop("_result")
+    results.append(r)
+    r = timed("parse:library", len(unique), lambda: parse_library(unique, reviews))
+    books = r.pop("_result")
+    results.append(r)
+    # What holding the parsed library costs, as pydantic models and as a CompactLibrary
+    for stage in ("parse:books", "parse:library"):
+        fn = (lambda: parse_books(unique, reviews)) if stage == "parse:books" else (lambda: parse_library(unique, reviews))
+        next(r for r in results if r["stage"] == stage)["retained_bytes"] = retained_bytes(fn)
+
+    # Every cover downloaded into an empty store, then again with all of them cached
+    urls = list(dict.fromkeys(cover_url(b) for b in books))
+    with tempfile.TemporaryDirectory() as covers_dir:
+        for stage in ("covers", "covers:cached"):
+            requests = transport.requests
+            r = timed(stage, len(urls),
+                      lambda: asyncio.run(fetch_covers(urls, transport, covers_dir, args.cover_concurrency)))
+            r.pop("_result")
+            r["requests"] = transport.requests - requests
+            results.append(r)
+
+    # The exporters read the CompactLibrary directly, as the CLI does.
+    # Each export gets a fresh directory, since an unchanged library would otherwise not be rewritten
+    with tempfile.TemporaryDirectory() as out:
+        for fmt in EXPORT_FORMATS:
+            if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+                continue
+            exporter = Exporter(f"{out}/{fmt}")
+            r = timed(f"export:{fmt}", len(books), lambda: exporter.export(books, [fmt]))
+            r.pop("_result")
+            results.append(r)
+        exporter = Exporter(f"{out}/all")
+        for stage in ("export:all", "export:unchanged"):
+            r = timed(stage, len(books), lambda: exporter.export(books))
+            r.pop("_result")
+            results.append(r)
+
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["stage"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get(r["stage"])
+        if not base or not base.get("items_per_sec"):
+            continue
+        ratio = r["items_per_sec"] / base["items_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{r['stage']}: {ratio:.0%} of baseline throughput")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--lists", type=int, default=5)
+    parser.add_argument("--overlap", type=float, default=0.3, help="chance a book is on a second list")
+    parser.add_argument("--description-words", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After sent with injected 429s")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cover-concurrency", type=int, default=16)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a previous --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(args)
+
+    print(f"{'stage':<24}{'seconds':>10}{'items':>10}{'items/s':>14}{'retained MB':>14}")
+    for r in results:
+        retained = f"{r['retained_bytes'] / 2**20:.1f}" if "retained_bytes" in r else ""
+        print(f"{r['stage']:<24}{r['seconds']:>10.3f}{r['items']:>10}{r['items_per_sec']:>14.0f}{retained:>14}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
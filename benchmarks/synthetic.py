@@ -0,0 +1,230 @@
+"""
+Synthetic Fable API payloads and a mock transport that serves them.
+
+The payload shapes mirror what `parse_book` reads from the real reviews,
+book_lists and book_lists/{id}/books endpoints.
+"""
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+GENRES = ["Fantasy", "Romance", "Science Fiction", "Mystery", "Thriller", "Literary Fiction",
+          "Historical Fiction", "Horror", "Memoir", "Young Adult", "Contemporary", "Nonfiction"]
+MOODS = ["adventurous", "dark", "emotional", "funny", "hopeful", "informative", "inspiring",
+         "lighthearted", "mysterious", "reflective", "relaxing", "sad", "tense"]
+TROPES = ["enemies to lovers", "found family", "chosen one", "slow burn", "second chance",
+          "forced proximity", "unreliable narrator", "heist", "fake dating", "locked room"]
+WARNINGS = ["violence", "death", "grief", "abuse", "addiction", "war", "self harm"]
+LIST_NAMES = ["Read", "Want to Read", "Currently Reading", "Favorites", "Did Not Finish",
+              "Book Club", "Summer", "Owned", "Audiobooks", "Re-reads"]
+WORDS = ("the of and a to in is was he she it for on with as his her at by from they we an be "
+         "this that which story world book novel heart secret city night king queen war love").split()
+
+
+@dataclass
+class SyntheticLibrary:
+    books: int = 1000
+    lists: int = 5
+    overlap: float = 0.3
+    description_words: int = 120
+    review_ratio: float = 0.6
+    seed: int = 1
+    user_id: str = "bench-user"
+    reviews: List[Dict[str, Any]] = field(default_factory=list, init=False)
+    book_lists: List[Dict[str, Any]] = field(default_factory=list, init=False)
+    list_items: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict, init=False)
+
+    def __post_init__(self):
+        rng = random.Random(self.seed)
+        self.book_lists = [
+            {"id": f"list-{i}", "name": LIST_NAMES[i % len(LIST_NAMES)] + ("" if i < len(LIST_NAMES) else f" {i}")}
+            for i in range(self.lists)
+        ]
+        self.list_items = {lst["id"]: [] for lst in self.book_lists}
+        for n in range(self.books):
+            book = self._book(rng, n)
+            homes = [self.book_lists[n % self.lists]["id"]]
+            if self.lists > 1 and rng.random() < self.overlap:
+                extra = rng.choice([lst["id"] for lst in self.book_lists if lst["id"] != homes[0]])
+                homes.append(extra)
+            for list_id in homes:
+                items = self.list_items[list_id]
+                items.append({
+                    "id": f"item-{list_id}-{n}",
+                    "book": book,
+                    "favorite": rng.random() < 0.1,
+                    "sort_value": len(items),
+                })
+            if rng.random() < self.review_ratio:
+                self.reviews.append(self._review(rng, book["id"]))
+
+    def _text(self, rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def _book(self, rng: random.Random, n: int) -> Dict[str, Any]:
+        status = rng.choice(["finished", "reading", "unread"])
+        isbn = "978" + str(rng.randrange(10**9, 10**10))
+        return {
+            "id": f"book-{n}",
+            "title": f"Synthetic Book {n}",
+            "subtitle": "",
+            "authors": [
+                {"name": f"Author {rng.randrange(self.books // 3 + 1)}", "slug": None, "biography": self._text(rng, 20)}
+                for _ in range(rng.choice([1, 1, 1, 2]))
+            ],
+            "isbn": isbn,
+            "display_isbn": isbn,
+            "imprint": "Synthetic Press",
+            "page_count": rng.randrange(80, 900),
+            "chapter_count": rng.randrange(5, 60),
+            "published_date": f"{rng.randrange(1950, 2025)}-0{rng.randrange(1, 10)}-1{rng.randrange(0, 10)}",
+            "description": self._text(rng, self.description_words),
+            "cover_image": f"https://images.example.com/covers/{n}.jpg",
+            "cover_image_small": f"https://images.example.com/covers/{n}_small.jpg",
+            "background_color": "#336699",
+            "url": f"https://fable.co/book/synthetic-book-{n}",
+            "source": "synthetic",
+            "price_usd": "9.99",
+            "non_fiction": rng.random() < 0.2,
+            "family_id": n,
+            "is_free": False,
+            "can_purchase": True,
+            "can_download": False,
+            "store_availability": "available",
+            "is_out_of_catalog": False,
+            "genres": [{"id": g, "name": g} for g in rng.sample(GENRES, rng.randrange(1, 4))],
+            "subjects": [["Fiction", rng.choice(GENRES)]],
+            "storygraph_tags": {
+                "moods": rng.sample(MOODS, rng.randrange(0, 4)),
+                "content_warnings": rng.sample(WARNINGS, rng.randrange(0, 3)),
+            },
+            "tropes": rng.sample(TROPES, rng.randrange(0, 3)),
+            "bookseries_set": (
+                [{"book_series": {"name": f"Series {n % 50}"}, "position": rng.randrange(1, 8)}]
+                if rng.random() < 0.3 else []
+            ),
+            "reading_progress": {
+                "current_percentage": rng.random() * 100,
+                "current_page": rng.randrange(0, 80),
+                "page_count": 80,
+                "status": status,
+            },
+            "started_reading_at": "2024-01-02T10:00:00Z",
+            "finished_reading_at": "2024-02-03T10:00:00Z" if status == "finished" and rng.random() < 0.5 else None,
+            "started_reading_date_type": "exact",
+            "finished_reading_date_type": "exact",
+            "created_at": "2023-12-01T10:00:00Z",
+        }
+
+    def _review(self, rng: random.Random, book_id: str) -> Dict[str, Any]:
+        return {
+            "id": f"review-{book_id}",
+            "book": {"id": book_id},
+            "rating": rng.randrange(1, 11) / 2,
+            "characters_rating": rng.randrange(1, 6),
+            "plot_rating": rng.randrange(1, 6),
+            "writing_style_rating": rng.randrange(1, 6),
+            "setting_rating": rng.randrange(1, 6),
+            "review": self._text(rng, 40),
+            "created_at": "2024-02-04T10:00:00Z",
+            "updated_at": "2024-02-05T10:00:00Z",
+        }
+
+    @property
+    def item_count(self) -> int:
+        return sum(len(items) for items in self.list_items.values())
+
+
+def _page(results: List[Dict[str, Any]], request: httpx.Request) -> Dict[str, Any]:
+    limit = int(request.url.params.get("limit", "50"))
+    offset = int(request.url.params.get("offset", "0"))
+    page = results[offset:offset + limit]
+    more = offset + limit < len(results)
+    return {
+        "count": len(results),
+        "next": str(request.url.copy_merge_params({"offset": offset + limit})) if more else None,
+        "previous": None,
+        "results": page,
+    }
+
+
+class MockFableTransport(httpx.MockTransport):
+    """
+    Serves a SyntheticLibrary as if it were api.fable.co.
+
+    `latency` adds a fixed delay (seconds) to every response and
+    `throttle_every` answers every Nth request with a 429 and `Retry-After`.
+    With `etags`, responses carry an ETag and matching `If-None-Match`
+    requests get a bodiless 304. Cover image URLs are answered with fake
+    image bytes.
+    """
+
+    def __init__(self, library: SyntheticLibrary, latency: float = 0.0,
+                 throttle_every: int = 0, retry_after: float = 0.0, etags: bool = True):
+        self.library = library
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.etags = etags
+        self.requests = 0
+        self.throttled = 0
+        self.not_modified = 0
+        super().__init__(self._handle)
+
+    def _json(self, request: httpx.Request, payload: Any) -> httpx.Response:
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.etags:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            if request.headers.get("if-none-match") == etag:
+                self.not_modified += 1
+                return httpx.Response(304, headers={"ETag": etag})
+            headers["ETag"] = etag
+        return httpx.Response(200, headers=headers, content=body)
+
+    def _cover(self, request: httpx.Request) -> httpx.Response:
+        # A deterministic ~16 KB "JPEG" per cover URL
+        seed = hashlib.sha256(request.url.path.encode("utf-8")).digest()
+        return httpx.Response(200, headers={"Content-Type": "image/jpeg"}, content=b"\xff\xd8\xff\xe0" + seed * 512)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.throttle_every and self.requests % self.throttle_every == 0:
+            self.throttled += 1
+            return httpx.Response(429, headers={"Retry-After": str(self.retry_after)})
+
+        if request.url.host == "images.example.com":
+            return self._cover(request)
+        lib = self.library
+        parts = [p for p in request.url.path.split("/") if p]
+        if parts == ["api", "settings", "profile"]:
+            return httpx.Response(200, json={"id": lib.user_id})
+        # ['api', 'v2', 'users', user_id, ...]
+        if parts[:3] != ["api", "v2", "users"] or len(parts) < 5 or parts[3] != lib.user_id:
+            return httpx.Response(404, json={"detail": "Not found."})
+        rest = parts[4:]
+        if rest == ["reviews"]:
+            return self._json(request, _page(lib.reviews, request))
+        if rest == ["book_lists"]:
+            return self._json(request, {"count": len(lib.book_lists), "results": lib.book_lists})
+        if len(rest) == 3 and rest[0] == "book_lists" and rest[2] == "books":
+            items = lib.list_items.get(rest[1])
+            if items is None:
+                return httpx.Response(404, json={"detail": "Not found."})
+            return self._json(request, _page(items, request))
+        return httpx.Response(404, json={"detail": "Not found."})
+
+
+def make_client(library: SyntheticLibrary, transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs):
+    """A FableClient wired to the mock transport instead of the network."""
+    from fable_to_goodreads.client import FableClient
+
+    kwargs.setdefault("raw_format", None)
+    return FableClient(library.user_id, "JWT bench-token", transport=transport or MockFableTransport(library), **kwargs)
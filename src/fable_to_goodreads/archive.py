@@ -0,0 +1,242 @@
+import asyncio
+import gzip
+import json
+import os
+import queue
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+RAW_FORMATS = ("json", "gzip", "jsonl")
+
+# Responses queued for the writer before `asave` makes the crawl wait
+DEFAULT_MAX_PENDING = 64
+
+_STOP = object()
+
+
+def _encode(data: Union[bytes, Any]) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class RawArchive:
+    """
+    Saves raw API responses on a background writer thread so disk writes and
+    compression never block the event loop.
+
+    Formats:
+      json   one compact `{name}.json` file per response
+      gzip   one `{name}.json.gz` file per response
+      jsonl  a single append-only `raw_{timestamp}.jsonl.gz` per run, each
+             record its own gzip member, plus a `.index.json` mapping every
+             response name to the byte offset of its member
+
+    `on_saved(name)` is called from the writer thread once a response is
+    fully written, e.g. to checkpoint the crawl.
+
+    At most `max_pending` responses wait for the writer. Beyond that, `save`
+    blocks and `asave` waits, so a crawl outpacing the disk is held back
+    instead of piling responses up in memory.
+    """
+
+    def __init__(
+        self,
+        raw_dir: str = "raw_data",
+        fmt: str = "json",
+        on_saved: Optional[Callable[[str], None]] = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        if fmt not in RAW_FORMATS:
+            raise ValueError(f"Unknown raw archive format '{fmt}' (expected one of {', '.join(RAW_FORMATS)})")
+        self.raw_dir = Path(raw_dir)
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.on_saved = on_saved
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+        self._archive_path: Optional[Path] = None
+        self._index: Dict[str, int] = {}
+        if fmt == "jsonl":
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self._archive_path = self.raw_dir / f"raw_{stamp}.jsonl.gz"
+
+    def save(self, name: str, data: Union[bytes, Any]):
+        """
+        Queue one response for writing, blocking while the queue is full.
+        `data` is either the raw response body or a JSON-serialisable object;
+        objects are encoded immediately so later mutation by the caller cannot
+        race with the writer.
+        """
+        self._queue.put(self._entry(name, data))
+
+    async def asave(self, name: str, data: Union[bytes, Any]):
+        """Like `save`, but waits for room in the queue without blocking the event loop."""
+        entry = self._entry(name, data)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, entry)
+
+    def _entry(self, name: str, data: Union[bytes, Any]) -> Tuple[str, bytes]:
+        if self._error is not None:
+            raise RuntimeError(f"Raw archive writer failed: {self._error}") from self._error
+        self._ensure_started()
+        return name, _encode(data)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Raw archive writer failed: {self._error}") from self._error
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fable-raw-archive", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        archive = open(self._archive_path, "ab") if self._archive_path else None
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    break
+                if self._error is not None:
+                    continue
+                try:
+                    self._write(archive, *entry)
+                    if self.on_saved is not None:
+                        self.on_saved(entry[0])
+                except Exception as e:
+                    self._error = e
+        finally:
+            if archive is not None:
+                archive.close()
+                with open(_index_path(self._archive_path), "w", encoding="utf-8") as f:
+                    json.dump(self._index, f, separators=(",", ":"))
+
+    def _write(self, archive, name: str, body: bytes):
+        # Per-response files are replaced atomically, so an interrupted run never leaves a torn one
+        if self.fmt == "json":
+            _replace(self.raw_dir / f"{name}.json", body)
+        elif self.fmt == "gzip":
+            _replace(self.raw_dir / f"{name}.json.gz", gzip.compress(body))
+        else:
+            if b"\n" in body:
+                # Records are newline-delimited, so re-encode pretty-printed bodies compactly
+                body = _encode(json.loads(body))
+            record = b'{"name":' + json.dumps(name).encode("utf-8") + b',"data":' + body + b"}\n"
+            offset = archive.tell()
+            archive.write(gzip.compress(record))
+            archive.flush()
+            self._index[name] = offset
+
+
+def _replace(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _index_path(archive_path: Path) -> Path:
+    return archive_path.with_name(archive_path.name.replace(".jsonl.gz", ".index.json"))
+
+
+def _read_index(archive_path: Path) -> Optional[Dict[str, int]]:
+    """The offset index of a jsonl archive, or None if its run never got to write one."""
+    try:
+        with open(_index_path(archive_path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if isinstance(index, dict) else None
+
+
+def _read_member(f, offset: int) -> Any:
+    f.seek(offset)
+    with gzip.GzipFile(fileobj=f) as member:
+        return json.loads(member.readline())["data"]
+
+
+def _iter_archive(path: Path) -> Iterator[Tuple[str, Any]]:
+    """Records of one jsonl archive, stopping quietly at a record torn by an interrupted run."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["name"], record["data"]
+    except (EOFError, zlib.error, gzip.BadGzipFile, ValueError):
+        return
+
+
+def read_pages(raw_dir: str, names: Iterable[str]) -> Dict[str, Any]:
+    """
+    The saved responses called `names`, whatever format each was archived
+    in. Names that can't be found are left out.
+    """
+    root = Path(raw_dir)
+    wanted = set(names)
+    pages: Dict[str, Any] = {}
+    for name in wanted:
+        for path, opener in ((root / f"{name}.json", open), (root / f"{name}.json.gz", gzip.open)):
+            if path.exists():
+                with opener(path, "rt", encoding="utf-8") as f:
+                    pages[name] = json.load(f)
+                break
+    if len(pages) < len(wanted):
+        for path in sorted(root.glob("raw_*.jsonl.gz")):
+            index = _read_index(path)
+            if index is None:
+                # An interrupted run leaves no index, so scan its archive
+                pages.update((name, data) for name, data in _iter_archive(path) if name in wanted)
+                continue
+            with open(path, "rb") as f:
+                for name in sorted(wanted & index.keys(), key=index.get):
+                    pages[name] = _read_member(f, index[name])
+    return pages
+
+
+def read_archived(archive_path: str, name: str) -> Any:
+    """Read a single response from a jsonl archive using its offset index."""
+    path = Path(archive_path)
+    with open(_index_path(path), "r", encoding="utf-8") as f:
+        offset = json.load(f)[name]
+    with open(path, "rb") as f:
+        return _read_member(f, offset)
+
+
+def iter_raw(raw_dir: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (name, data) for every response saved in `raw_dir`, whatever format
+    it was archived in. Names match those passed to `RawArchive.save`, e.g.
+    `reviews_0` or `list_<list id>_100`. Files are read oldest first, so when a
+    name was saved more than once the last copy yielded is the newest.
+    """
+    root = Path(raw_dir)
+    archives = set(root.glob("raw_*.jsonl.gz"))
+    indexes = set(root.glob("raw_*.index.json"))
+    paths = archives | set(root.glob("*.json.gz")) | (set(root.glob("*.json")) - indexes)
+    for path in sorted(paths, key=lambda path: (path.stat().st_mtime, path.name)):
+        if path in archives:
+            yield from _iter_archive(path)
+        elif path.name.endswith(".json.gz"):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                yield path.name[: -len(".json.gz")], json.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                yield path.stem, json.load(f)
+
@@ -0,0 +1,133 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .exporter import EXPORT_FORMATS
+
+DEFAULT_BATCH_DIR = "accounts"
+
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+@dataclass
+class Account:
+    """One account of a batch export, with its own output, raw and database paths."""
+    name: str
+    email: Optional[str] = None
+    password: Optional[str] = None
+    user_id: Optional[str] = None
+    auth_token: Optional[str] = None
+    concurrency: Optional[int] = None
+    formats: Optional[List[str]] = None
+    root: Path = field(default_factory=lambda: Path(DEFAULT_BATCH_DIR))
+
+    @property
+    def output_dir(self) -> Path:
+        return self.root / "outputs"
+
+    @property
+    def raw_dir(self) -> Path:
+        return self.root / "raw_data"
+
+    @property
+    def store_path(self) -> Path:
+        return self.root / "fable_library.db"
+
+    @property
+    def cache_path(self) -> Path:
+        return self.root / "fable_http_cache.db"
+
+
+def _account(entry: Any, index: int, batch_dir: Path) -> Account:
+    if not isinstance(entry, dict):
+        raise ValueError(f"Account #{index + 1} in the manifest is not an object")
+    name = entry.get("name") or entry.get("email")
+    if not name:
+        raise ValueError(f"Account #{index + 1} in the manifest needs a 'name' or 'email'")
+
+    password = entry.get("password")
+    if not password and entry.get("password_env"):
+        password = os.getenv(entry["password_env"])
+        if not password:
+            raise ValueError(f"Account '{name}': environment variable {entry['password_env']} is not set")
+    has_login = bool(entry.get("email") and password)
+    has_token = bool(entry.get("user_id") and entry.get("auth_token"))
+    if not has_login and not has_token:
+        raise ValueError(f"Account '{name}' needs 'email' and 'password' (or 'password_env'), or 'user_id' and 'auth_token'")
+
+    formats = entry.get("formats")
+    if isinstance(formats, str):
+        formats = [f.strip() for f in formats.split(",") if f.strip()]
+    # Checked here like the CLI flags, so a typo fails before any account is crawled
+    if formats is not None and (
+        not isinstance(formats, list) or not formats or any(f not in EXPORT_FORMATS for f in formats)
+    ):
+        raise ValueError(f"Account '{name}': 'formats' must be a comma-separated list of: {', '.join(EXPORT_FORMATS)}")
+
+    concurrency = entry.get("concurrency")
+    if concurrency is not None and (not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1):
+        raise ValueError(f"Account '{name}': 'concurrency' must be a whole number of at least 1")
+
+    root = entry.get("output_dir") or batch_dir / _SAFE_NAME_RE.sub("_", str(name))
+    return Account(
+        name=str(name),
+        email=entry.get("email"),
+        password=password,
+        user_id=entry.get("user_id"),
+        auth_token=entry.get("auth_token"),
+        concurrency=concurrency,
+        formats=formats,
+        root=Path(root),
+    )
+
+
+def load_manifest(path: str, batch_dir: str = DEFAULT_BATCH_DIR) -> List[Account]:
+    """
+    Read a batch manifest: a JSON list of accounts, or an object with an
+    `accounts` list. Each account has a `name` and either `email` plus
+    `password` / `password_env`, or an already captured `user_id` and
+    `auth_token`. Names must be unique. `concurrency`, `formats` and
+    `output_dir` are optional; by default each account writes under
+    `<batch_dir>/<name>/`.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data: Dict[str, Any] = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Could not read manifest {path}: {e}") from e
+
+    entries = data.get("accounts") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Manifest {path} has no accounts")
+
+    accounts = [_account(entry, i, Path(batch_dir)) for i, entry in enumerate(entries)]
+    # Results and the summary are keyed by name
+    names = [a.name for a in accounts]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Accounts in {path} must have distinct names (repeated: {', '.join(duplicates)})")
+    roots = [a.root.resolve() for a in accounts]
+    if len(set(roots)) != len(roots):
+        raise ValueError(f"Accounts in {path} must have distinct output directories")
+    return accounts
+
+
+def find_archived_accounts(root: str) -> List[Account]:
+    """
+    The accounts archived under `root`, laid out as a batch export leaves
+    them: one `<name>/raw_data/` per account. Sorted by name.
+    """
+    base = Path(root)
+    if not base.is_dir():
+        raise FileNotFoundError(f"Directory not found: {base}")
+    accounts = [
+        Account(name=child.name, root=child)
+        for child in sorted(base.iterdir())
+        if child.is_dir() and (child / "raw_data").is_dir()
+    ]
+    if not accounts:
+        raise FileNotFoundError(f"No archived accounts (<name>/raw_data/) found in {base}")
+    return accounts
@@ -0,0 +1,108 @@
+"""
+Crawl checkpoints, so an interrupted export can resume where it stopped.
+
+While the raw archive is on, every page it finishes writing is appended to
+`checkpoint.jsonl` in the raw data directory. With `--resume`, the pages the
+journal lists are read back from the archive instead of being downloaded
+again, and the crawl only fetches what is missing. A run that completes
+removes its journal.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .archive import read_pages
+
+CHECKPOINT_FILENAME = "checkpoint.jsonl"
+
+# Bumped when the journal layout changes; older journals are ignored
+CHECKPOINT_VERSION = 2
+
+
+class CrawlCheckpoint:
+    """
+    Append-only journal of the raw pages saved by one crawl.
+
+    The first line identifies the crawl (user id and page sizes, which fix
+    the page offsets). Each further line names one page that is safely on
+    disk. Lines are written whole and flushed, and a torn last line from a
+    crash is ignored on load.
+    """
+
+    def __init__(self, path: Path, header: Dict[str, Any], names=()):
+        self.path = Path(path)
+        self.header = header
+        self.names = set(names)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Start from a complete journal, swapped in atomically
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for name in sorted(self.names):
+                f.write(json.dumps({"page": name}) + "\n")
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def read(path: Path) -> Tuple[Optional[Dict[str, Any]], set]:
+        """The header and page names of an existing journal (None and an empty set if there is none)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return None, set()
+        header = None
+        names = set()
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if i == 0:
+                header = record
+            elif isinstance(record, dict) and "page" in record:
+                names.add(record["page"])
+        return header, names
+
+    def record(self, name: str):
+        with self._lock:
+            if self._f is None or name in self.names:
+                return
+            self.names.add(name)
+            self._f.write(json.dumps({"page": name}) + "\n")
+            self._f.flush()
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def finish(self):
+        """The crawl completed: nothing is left to resume."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def open_checkpoint(
+    raw_dir: str, user_id: str, page_sizes: Dict[str, int], resume: bool = False
+) -> Tuple[CrawlCheckpoint, Dict[str, Any]]:
+    """
+    Start the checkpoint journal for a crawl of `user_id` into `raw_dir`.
+
+    With `resume`, an existing journal for the same user and page sizes is
+    carried over, and the pages it lists are returned keyed by archive name
+    (e.g. `reviews_50`, `list_<list id>_100`). Pages the archive no longer has
+    are dropped from the journal so they are fetched again.
+    """
+    path = Path(raw_dir) / CHECKPOINT_FILENAME
+    header = {"version": CHECKPOINT_VERSION, "user_id": user_id, "page_sizes": page_sizes}
+    pages: Dict[str, Any] = {}
+    if resume:
+        previous, names = CrawlCheckpoint.read(path)
+        if previous == header and names:
+            pages = read_pages(raw_dir, names)
+    return CrawlCheckpoint(path, header, pages), pages
@@ -1,21 +1,46 @@
-import asyncio
+import argparse
 import os
+import re
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+from typing import Optional
 
-from .auth import fetch_credentials_via_browser
-from .client import FableClient
-from .exporter import Exporter
+# Only cheap modules are imported here. rich, httpx, pydantic and Playwright
+# are imported by the code paths that need them, so `--help` and offline
+# replay don't pay for the browser or the network stack.
+from .archive import RAW_FORMATS
+from .batch import DEFAULT_BATCH_DIR
+from .covers import DEFAULT_COVER_CONCURRENCY, DEFAULT_COVERS_DIRNAME
+from .exporter import DEFAULT_FORMATS, EXPORT_FORMATS
+from .httpcache import DEFAULT_CACHE_PATH
+from .index import DEFAULT_INDEX_FILENAME
+from .llm import DEFAULT_TOKEN_BUDGET
+from .store import DEFAULT_STORE_PATH
 
-console = Console()
+_console = None
+
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+def make_progress():
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=get_console()
+    )
 
 def print_header():
-    console.print(Panel.fit(
+    from rich.panel import Panel
+
+    get_console().print(Panel.fit(
         """[bold magenta]Fable to Goodreads[/bold magenta]
 [italic]Free your library from the Fable ecosystem[/italic]
 
@@ -25,11 +50,201 @@ Created by [bold blue]Joel DeBolt[/bold blue]""",
 
 ENV_FILE = Path.home() / ".fable_export_env"
 
-async def run_export():
-    load_dotenv(ENV_FILE)
+async def login(email, password, metrics, fresh_login=False, login_lock=None, label=""):
+    """
+    Log into Fable, reusing the cached session when possible. Returns the
+    user id, auth token, whether they came from the cache, and a callback
+    that logs in again (for the client to call on a 401).
+
+    `login_lock` serialises browser logins, e.g. across the accounts of a batch.
+    """
+    import asyncio
+
+    from .session import SessionCache
+
+    console = get_console()
+    session_cache = SessionCache()
+    login_lock = login_lock or asyncio.Lock()
+
+    async def browser_login():
+        from .auth import fetch_credentials_via_browser
+
+        async with login_lock:
+            console.print(f"\n[dim]{label}Logging into Fable...[/dim]")
+            try:
+                user_id, auth_token = await fetch_credentials_via_browser(email, password)
+            except Exception as e:
+                raise RuntimeError(f"Browser login failed: {e}") from e
+        session_cache.save(email, user_id, auth_token)
+        return user_id, auth_token
+
+    async def reauthenticate():
+        # The API rejected the token, so don't let a later run try it again
+        session_cache.clear(email)
+        _, auth_token = await browser_login()
+        return auth_token
+
+    cached = None if fresh_login else session_cache.load(email)
+    if cached:
+        user_id, auth_token = cached
+        console.print(f"\n[dim]{label}Using cached Fable session[/dim]")
+    else:
+        with metrics.stage("login"):
+            user_id, auth_token = await browser_login()
+    console.print(f"[dim]{label}Authenticated as user [bold]{user_id}[/bold][/dim]")
+    return user_id, auth_token, bool(cached), reauthenticate
+
+async def crawl_account(
+    client,
+    exporter,
+    progress,
+    metrics,
+    concurrency: int = 4,
+    store=None,
+    formats=DEFAULT_FORMATS,
+    label: str = "",
+    covers=None,
+):
+    """
+    Crawl, parse and export one account's library; returns the exported paths
+    by label. With a `CoverDownloader`, covers are downloaded before export.
+    """
+    from .pipeline import ParsePipeline
+    from .scheduler import CrawlScheduler, gather_or_cancel
+
+    scheduler = CrawlScheduler(concurrency)
+
+    # Step 1-4: Reviews, lists and list contents are crawled concurrently
+    # and streamed into the parser as pages arrive
+    task1 = progress.add_task(f"[cyan]{label}Fetching reviews and ratings...", total=None)
+    task2 = progress.add_task(f"[cyan]{label}Fetching book lists...", total=None)
+    task3 = progress.add_task(f"[cyan]{label}Downloading book data...", total=None)
+    task4 = progress.add_task(f"[cyan]{label}Parsing and normalizing...", total=None)
+
+    pipeline = ParsePipeline(
+        track_hashes=store is not None,
+        on_progress=lambda parsed, received: progress.update(task4, completed=parsed, total=received),
+    )
+
+    async def crawl_reviews():
+        # Always walked in full, even with a store (see `LibraryStore`)
+        try:
+            with metrics.stage("reviews"):
+                async for page in client.iter_review_pages():
+                    pipeline.add_review_page(page)
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch reviews: {e}") from e
+        reviews = pipeline.reviews
+        if store:
+            store.sync_reviews(reviews)
+        await pipeline.finish_reviews(reviews)
+        progress.update(task1, completed=100, total=100, description=f"[green]{label}Fetched {len(reviews)} reviews")
 
-    user_id = os.getenv("FABLE_USER_ID")
-    auth_token = os.getenv("FABLE_AUTH_TOKEN")
+    async def crawl_lists():
+        try:
+            with metrics.stage("lists"):
+                lists = await client.fetch_lists()
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch book lists: {e}") from e
+        progress.update(task2, completed=100, total=100, description=f"[green]{label}Found {len(lists)} lists")
+        if store:
+            store.prune_lists(lst["id"] for lst in lists)
+        progress.update(task3, total=len(lists))
+        return lists
+
+    async def crawl_list(index, lst):
+        name = lst.get("name", "Unknown")
+        stopped = False
+        fetched = []
+        position = 0
+        offset = 0
+
+        # Called for each full page, in order, while the list is walked sequentially
+        def stop(page):
+            nonlocal stopped, offset
+            stopped = store.list_page_unchanged(lst["id"], page, offset)
+            offset += len(page.get("results") or [])
+            return stopped
+
+        try:
+            with metrics.stage(f"list:{name}"):
+                async for items in client.iter_list_pages(lst["id"], name, stop=stop if store else None):
+                    await pipeline.put_items(index, position, items)
+                    position += len(items)
+                    if store:
+                        fetched.extend(items)
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch list '{name}': {e}") from e
+        if store:
+            rest = store.sync_list(lst["id"], name, fetched, complete=not stopped)
+            await pipeline.put_items(index, position, rest)
+        progress.advance(task3)
+
+    async def crawl_books():
+        lists = await scheduler.run(crawl_lists())
+        await scheduler.gather(crawl_list(i, lst) for i, lst in enumerate(lists))
+
+    async def crawl():
+        # crawl_books only coordinates, so it must not hold a scheduler slot itself
+        await gather_or_cancel([scheduler.spawn(crawl_reviews()), crawl_books()])
+        await pipeline.close()
+
+    try:
+        with metrics.stage("crawl"):
+            _, books = await gather_or_cancel([crawl(), pipeline.run()])
+    except Exception:
+        for task in (task1, task2, task3, task4):
+            progress.update(task, visible=False)
+        raise
+    metrics.add_time("parse", pipeline.parse_seconds)
+
+    if covers is not None:
+        with metrics.stage("covers"):
+            await fetch_covers(progress, covers, books, exporter.output_dir, metrics, label)
+
+    if store:
+        store.save_books(books, pipeline.raw_hashes, pipeline.reviews)
+
+    # Step 5: Export
+    with metrics.stage("export"):
+        return export_books(progress, exporter, books, formats, metrics, label)
+
+async def fetch_covers(progress, downloader, books, output_dir, metrics=None, label=""):
+    from .covers import attach_covers, cover_url
+
+    urls = list(dict.fromkeys(url for url in map(cover_url, books) if url))
+    task = progress.add_task(f"[cyan]{label}Downloading covers...", total=len(urls))
+    paths = await downloader.download(urls, metrics, on_done=lambda: progress.advance(task))
+    attached = attach_covers(books, paths, output_dir)
+    progress.update(task, description=f"[green]{label}{attached} covers saved")
+
+async def run_export(
+    concurrency: int = 4,
+    incremental: bool = False,
+    store_path: str = DEFAULT_STORE_PATH,
+    raw_format: Optional[str] = "json",
+    formats=DEFAULT_FORMATS,
+    llm_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    llm_description_words: Optional[int] = None,
+    metrics_path: Optional[str] = None,
+    fresh_login: bool = False,
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    covers_dir: Optional[str] = None,
+    cover_concurrency: int = DEFAULT_COVER_CONCURRENCY,
+    resume: bool = False,
+):
+    from dotenv import load_dotenv
+    from rich.prompt import Prompt
+
+    from .client import FableClient
+    from .covers import CoverDownloader, CoverStore
+    from .exporter import Exporter
+    from .metrics import Metrics
+    from .store import LibraryStore
+
+    console = get_console()
+    metrics = Metrics()
+    load_dotenv(ENV_FILE)
 
     email = os.getenv("FABLE_EMAIL")
     password = os.getenv("FABLE_PASSWORD")
@@ -42,89 +257,657 @@ async def run_export():
             f.write(f"FABLE_EMAIL={email}\nFABLE_PASSWORD={password}\n")
         console.print(f"[dim]Saved to {ENV_FILE}[/dim]")
 
-    console.print("\n[dim]Logging into Fable...[/dim]")
+    user_id, auth_token, cached, reauthenticate = await login(email, password, metrics, fresh_login)
+
+    exporter = Exporter(llm_token_budget=llm_token_budget, llm_description_words=llm_description_words)
+    store = LibraryStore(store_path) if incremental else None
+
+    max_connections = max(concurrency * 2, 10, cover_concurrency if covers_dir else 0)
+    async with FableClient(
+        user_id, auth_token, max_connections=max_connections, raw_format=raw_format, metrics=metrics,
+        reauthenticate=reauthenticate, cache_path=cache_path, resume=resume,
+    ) as client:
+        http_cache = client.cache
+        if resume:
+            print_resume_note(client)
+        covers = CoverDownloader(client.session, CoverStore(covers_dir), cover_concurrency) if covers_dir else None
+        if cached:
+            # A rejected cached token triggers a fresh browser login inside the client
+            with metrics.stage("login"):
+                if not await client.validate_session():
+                    raise RuntimeError("Could not validate the Fable session.")
+        with make_progress() as progress:
+            try:
+                paths = await crawl_account(
+                    client, exporter, progress, metrics,
+                    concurrency=concurrency, store=store, formats=formats,
+                    covers=covers,
+                )
+            except Exception:
+                progress.stop()
+                if client.checkpoint is not None:
+                    console.print("[yellow]Run again with --resume to continue from the pages already fetched.[/yellow]")
+                raise
+            finally:
+                if store:
+                    store.close()
+        client.finish_checkpoint()
+
+    print_results(paths)
+    if http_cache is not None and http_cache.hits:
+        console.print(
+            f"[dim]{http_cache.hits} of {http_cache.hits + http_cache.misses} pages were unchanged "
+            f"and served from the HTTP cache ({cache_path}).[/dim]"
+        )
+    if covers is not None:
+        print_cover_stats(covers, covers_dir)
+    if client.resumed_pages:
+        console.print(f"[dim]Resumed {client.resumed_pages} pages from the interrupted run.[/dim]")
+    if raw_format:
+        console.print("\n[italic]Raw responses saved in ./raw_data for auditing.[/italic]")
+    if metrics_path:
+        report_metrics(metrics, metrics_path)
+
+async def run_batch(
+    manifest_path: str,
+    batch_dir: str,
+    jobs: int = 4,
+    max_connections: int = 20,
+    concurrency: int = 4,
+    incremental: bool = False,
+    raw_format: Optional[str] = "json",
+    formats=DEFAULT_FORMATS,
+    llm_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    llm_description_words: Optional[int] = None,
+    metrics_path: Optional[str] = None,
+    fresh_login: bool = False,
+    use_cache: bool = True,
+    covers_dir: Optional[str] = None,
+    cover_concurrency: int = DEFAULT_COVER_CONCURRENCY,
+    resume: bool = False,
+) -> bool:
+    """
+    Export every account in a manifest from one process. Accounts share one
+    connection pool (at most `max_connections` requests in flight overall),
+    at most `jobs` accounts run at once, and browser logins happen one at a
+    time. A failing account is reported and doesn't stop the others.
+    With `covers_dir`, every account's covers go to that one shared store.
+    Returns True if every account succeeded.
+    """
+    import asyncio
+    import json
+
+    from rich.table import Table
+
+    from .batch import load_manifest
+    from .client import FableClient
+    from .covers import CoverDownloader, CoverStore
+    from .exporter import Exporter
+    from .metrics import Metrics
+    from .store import LibraryStore
+
+    console = get_console()
+    accounts = load_manifest(manifest_path, batch_dir)
+    console.print(f"\n[dim]Exporting {len(accounts)} accounts from {manifest_path} ({jobs} at a time)...[/dim]")
+
+    account_slots = asyncio.Semaphore(jobs)
+    login_lock = asyncio.Lock()
+    results = {}
+
+    async def export_one(account, pool, covers, progress):
+        label = f"{account.name}: "
+        metrics = Metrics()
+        results[account.name] = {"metrics": metrics, "paths": {}, "error": None}
+        async with account_slots:
+            try:
+                account.root.mkdir(parents=True, exist_ok=True)
+                if account.user_id and account.auth_token:
+                    user_id, auth_token, cached = account.user_id, account.auth_token, True
+                    reauthenticate = None
+                    if account.email and account.password:
+                        async def reauthenticate():
+                            _, token, _, _ = await login(
+                                account.email, account.password, metrics, True, login_lock, label
+                            )
+                            return token
+                else:
+                    user_id, auth_token, cached, reauthenticate = await login(
+                        account.email, account.password, metrics, fresh_login, login_lock, label
+                    )
+                account_concurrency = account.concurrency or concurrency
+                store = LibraryStore(str(account.store_path)) if incremental else None
+                try:
+                    async with FableClient(
+                        user_id, auth_token, max_connections=max_connections, raw_dir=str(account.raw_dir),
+                        raw_format=raw_format, metrics=metrics, reauthenticate=reauthenticate,
+                        cache_path=str(account.cache_path) if use_cache else None, session=pool,
+                        resume=resume,
+                    ) as client:
+                        if resume:
+                            print_resume_note(client, label)
+                        if cached and not await client.validate_session():
+                            raise RuntimeError("Could not validate the Fable session.")
+                        results[account.name]["paths"] = await crawl_account(
+                            client, Exporter(str(account.output_dir), llm_token_budget, llm_description_words), progress, metrics,
+                            concurrency=account_concurrency, store=store,
+                            formats=account.formats or formats, label=label,
+                            covers=covers,
+                        )
+                        client.finish_checkpoint()
+                finally:
+                    if store:
+                        store.close()
+            except Exception as e:
+                results[account.name]["error"] = e
+                progress.console.print(f"[bold red]{label}failed:[/bold red] {e}")
+
+    pool = FableClient.make_pool(max_connections=max_connections, max_keepalive_connections=max_connections)
+    covers = CoverDownloader(pool, CoverStore(covers_dir), cover_concurrency) if covers_dir else None
     try:
-        user_id, auth_token = await fetch_credentials_via_browser(email, password)
-    except Exception as e:
-        raise RuntimeError(f"Browser login failed: {e}") from e
-    console.print(f"[dim]Authenticated as user [bold]{user_id}[/bold][/dim]")
+        with make_progress() as progress:
+            await asyncio.gather(*(export_one(account, pool, covers, progress) for account in accounts))
+    finally:
+        await pool.aclose()
 
-    client = FableClient(user_id, auth_token)
-    exporter = Exporter()
+    table = Table(title="Batch export", show_edge=False)
+    for col in ("Account", "Result", "Seconds", "Requests", "Output"):
+        table.add_column(col, justify="right" if col in ("Seconds", "Requests") else "left")
+    summary = {}
+    for account in accounts:
+        result = results[account.name]
+        data = result["metrics"].to_dict()
+        error = result["error"]
+        summary[account.name] = {
+            "ok": error is None,
+            "error": str(error) if error is not None else None,
+            "output_dir": str(account.output_dir),
+            "paths": {label: str(path) for label, path in result["paths"].items()},
+            "metrics": data,
+        }
+        table.add_row(
+            account.name,
+            "[green]ok[/green]" if error is None else "[red]failed[/red]",
+            f"{data['wall_seconds']:.1f}",
+            str(data["requests"]),
+            str(account.output_dir),
+        )
+    console.print()
+    console.print(table)
+    if covers is not None:
+        print_cover_stats(covers, covers_dir)
+    if metrics_path:
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        console.print(f"[dim]Metrics written to {metrics_path}[/dim]")
+    return all(r["error"] is None for r in results.values())
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console
-    ) as progress:
+def run_replay(
+    raw_dir: str,
+    formats=DEFAULT_FORMATS,
+    llm_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    llm_description_words: Optional[int] = None,
+    metrics_path: Optional[str] = None,
+    covers_dir: Optional[str] = None,
+):
+    from .exporter import Exporter
+    from .metrics import Metrics
+    from .replay import load_raw_dir
 
-        # Step 1: Reviews
-        task1 = progress.add_task("[cyan]Fetching reviews and ratings...", total=None)
-        try:
-            reviews = await client.fetch_reviews()
-        except Exception as e:
-            progress.stop()
-            raise RuntimeError(f"Failed to fetch reviews: {e}") from e
-        progress.update(task1, completed=100, total=100, description=f"[green]Fetched {len(reviews)} reviews")
+    metrics = Metrics()
+    get_console().print(f"\n[dim]Replaying saved responses from {raw_dir} (offline)...[/dim]")
+    with metrics.stage("load"):
+        reviews, all_raw_items = load_raw_dir(raw_dir)
+    exporter = Exporter(llm_token_budget=llm_token_budget, llm_description_words=llm_description_words)
 
-        # Step 2: Lists
-        task2 = progress.add_task("[cyan]Fetching book lists...", total=None)
-        try:
-            lists = await client.fetch_lists()
-        except Exception as e:
-            progress.stop()
-            raise RuntimeError(f"Failed to fetch book lists: {e}") from e
-        progress.update(task2, completed=100, total=100, description=f"[green]Found {len(lists)} lists")
-
-        # Step 3: Books
-        all_raw_items = []
-        task3 = progress.add_task("[cyan]Downloading book data...", total=len(lists))
-        for lst in lists:
-            name = lst.get("name", "Unknown")
-            items = await client.fetch_books_from_list(lst["id"], name)
-            all_raw_items.extend(items)
-            progress.advance(task3)
-            
-        # Step 4: Parse
-        task4 = progress.add_task("[cyan]Parsing and normalizing...", total=len(all_raw_items))
-        books = []
-        seen_ids = set()
-        for item in all_raw_items:
-            book = client.parse_book(item, reviews)
-            if book and book.id not in seen_ids:
-                books.append(book)
-                seen_ids.add(book.id)
-            progress.advance(task4)
-
-        # Step 5: Export
-        task5 = progress.add_task("[cyan]Exporting files...", total=4)
-        json_path = exporter.to_json(books)
-        progress.advance(task5)
-
-        gr_path = exporter.to_goodreads_csv(books)
-        progress.advance(task5)
-
-        master_path = exporter.to_master_csv(books)
-        progress.advance(task5)
-
-        recs_path = exporter.to_recommendations_jsonl(books)
-        progress.advance(task5)
+    with make_progress() as progress:
+        with metrics.stage("parse"):
+            books = parse_items(progress, all_raw_items, reviews)
+        if covers_dir:
+            link_cached_covers(books, covers_dir, exporter.output_dir)
+        with metrics.stage("export"):
+            paths = export_books(progress, exporter, books, formats, metrics)
+
+    print_results(paths)
+    if metrics_path:
+        report_metrics(metrics, metrics_path)
+
+def run_replay_all(
+    root: str,
+    jobs: int,
+    formats=DEFAULT_FORMATS,
+    llm_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    llm_description_words: Optional[int] = None,
+    metrics_path: Optional[str] = None,
+    covers_dir: Optional[str] = None,
+) -> bool:
+    """
+    Rebuild the exports of every account archived under `root` (see
+    `batch.find_archived_accounts`), offline. Parsing and exporting are
+    CPU-bound, so accounts are spread over a pool of `jobs` worker
+    processes, one account per worker at a time. Results are reported in
+    account order, whatever order they finish in, and a failing account
+    doesn't stop the others. Returns True if every account succeeded.
+    """
+    import json
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from rich.table import Table
+
+    from .batch import find_archived_accounts
+    from .replay import replay_account
+
+    console = get_console()
+    accounts = find_archived_accounts(root)
+    workers = min(jobs, len(accounts))
+    console.print(f"\n[dim]Replaying {len(accounts)} archived accounts from {root} on {workers} worker processes (offline)...[/dim]")
+
+    results = {}
+    start = time.perf_counter()
+    with make_progress() as progress, ProcessPoolExecutor(max_workers=workers) as pool:
+        task = progress.add_task("[cyan]Replaying accounts...", total=len(accounts))
+        futures = {
+            pool.submit(
+                replay_account, str(account.raw_dir), str(account.output_dir), formats,
+                llm_token_budget, llm_description_words, covers_dir,
+            ): account
+            for account in accounts
+        }
+        for future in as_completed(futures):
+            account = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed for running out of memory)
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}", "books": 0, "paths": {}, "metrics": None}
+            results[account.name] = result
+            if not result["ok"]:
+                progress.console.print(f"[bold red]{account.name}: failed:[/bold red] {result['error']}")
+            progress.advance(task)
+    wall_seconds = time.perf_counter() - start
 
+    table = Table(title="Bulk replay", show_edge=False)
+    for col in ("Account", "Result", "Books", "Seconds", "Output"):
+        table.add_column(col, justify="right" if col in ("Books", "Seconds") else "left")
+    summary = {}
+    for account in accounts:
+        result = results[account.name]
+        seconds = result["metrics"]["wall_seconds"] if result["metrics"] else None
+        summary[account.name] = {**result, "output_dir": str(account.output_dir)}
+        table.add_row(
+            account.name,
+            "[green]ok[/green]" if result["ok"] else "[red]failed[/red]",
+            str(result["books"]),
+            f"{seconds:.1f}" if seconds is not None else "-",
+            str(account.output_dir),
+        )
+    ok = sum(1 for r in results.values() if r["ok"])
+    books = sum(r["books"] for r in results.values())
+    account_seconds = sum(r["metrics"]["wall_seconds"] for r in results.values() if r["metrics"])
+    console.print()
+    console.print(table)
+    console.print(
+        f"[dim]{ok}/{len(accounts)} accounts, {books} books in {wall_seconds:.1f}s "
+        f"({account_seconds:.1f}s of account time on {workers} worker{'s' if workers != 1 else ''}).[/dim]"
+    )
+    if metrics_path:
+        total = {
+            "accounts": len(accounts), "ok": ok, "failed": len(accounts) - ok, "books": books,
+            "workers": workers, "wall_seconds": round(wall_seconds, 3), "account_seconds": round(account_seconds, 3),
+        }
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            json.dump({"total": total, "accounts": summary}, f, indent=2)
+        console.print(f"[dim]Metrics written to {metrics_path}[/dim]")
+    return ok == len(accounts)
+
+def link_cached_covers(books, covers_dir, output_dir):
+    """Offline counterpart of `fetch_covers`: link the covers already in the store, download nothing."""
+    from .covers import CoverStore, attach_cached_covers
+
+    attached = attach_cached_covers(books, CoverStore(covers_dir), output_dir)
+    get_console().print(f"[dim]Linked {attached} cached covers from {covers_dir}.[/dim]")
+
+def print_resume_note(client, label=""):
+    pages = len(client.checkpoint.names) if client.checkpoint is not None else 0
+    if pages:
+        get_console().print(f"[dim]{label}Resuming: {pages} pages already saved in {client.raw_dir}.[/dim]")
+    else:
+        get_console().print(f"[dim]{label}Nothing to resume in {client.raw_dir}; starting a full crawl.[/dim]")
+
+def print_cover_stats(covers, covers_dir):
+    get_console().print(
+        f"[dim]Covers: {covers.downloaded} downloaded, {covers.cached} already cached, "
+        f"{covers.failed} failed ({covers_dir}).[/dim]"
+    )
+
+def parse_items(progress, all_raw_items, reviews):
+    from .library import parse_library
+    from .parsing import merge_list_items
+
+    task = progress.add_task("[cyan]Parsing and normalizing...", total=len(all_raw_items))
+    books = parse_library(merge_list_items(all_raw_items), reviews)
+    progress.update(task, completed=len(all_raw_items))
+    return books
+
+def export_books(progress, exporter, books, formats=DEFAULT_FORMATS, metrics=None, label=""):
+    task = progress.add_task(f"[cyan]{label}Exporting files...", total=len(books))
+    return exporter.export(books, formats, on_book=lambda _: progress.advance(task), metrics=metrics)
+
+def print_results(paths):
+    console = get_console()
     console.print("\n[bold green]Done![/bold green]")
-    console.print(f"• Master JSON: [blue]{json_path}[/blue]")
-    console.print(f"• Goodreads CSV: [blue]{gr_path}[/blue]")
-    console.print(f"• Master CSV: [blue]{master_path}[/blue]")
-    console.print(f"• Recommendations JSONL: [blue]{recs_path}[/blue]")
-    console.print("\n[italic]Raw responses saved in ./raw_data for auditing.[/italic]")
+    for label, path in paths.items():
+        console.print(f"• {label}: [blue]{path}[/blue]")
+
+def report_metrics(metrics, path):
+    from rich.table import Table
+
+    console = get_console()
+    data = metrics.write_json(path)
+
+    stages = Table(title="Stages", show_edge=False)
+    stages.add_column("Stage")
+    stages.add_column("Seconds", justify="right")
+    for name, seconds in data["stages"].items():
+        stages.add_row(name, f"{seconds:.3f}")
+
+    endpoints = Table(title="Requests", show_edge=False)
+    for col in ("Endpoint", "Requests", "KB", "Retries", "p50 ms", "p95 ms"):
+        endpoints.add_column(col, justify="left" if col == "Endpoint" else "right")
+    for name, e in data["endpoints"].items():
+        latency = e["latency_ms"]
+        endpoints.add_row(
+            name, str(e["requests"]), f"{e['bytes'] / 1024:.0f}", str(e["retries"]),
+            str(latency["p50"] or "-"), str(latency["p95"] or "-"),
+        )
+
+    console.print()
+    console.print(stages)
+    if data["endpoints"]:
+        console.print(endpoints)
+    rss = data["peak_rss_bytes"]
+    console.print(
+        f"[dim]Wall time {data['wall_seconds']:.2f}s, {data['requests']} requests, "
+        f"{data['retries']} retries"
+        + (f", peak RSS {rss / 2**20:.0f} MiB" if rss else "")
+        + f". Metrics written to {path}[/dim]"
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="fable-export", description="Export your Fable.co library.")
+    parser.add_argument(
+        "--concurrency", type=int, default=4, metavar="N",
+        help="maximum number of crawls (reviews, lists) running at once (default: 4)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only download pages that changed since the last incremental sync",
+    )
+    parser.add_argument(
+        "--store", default=DEFAULT_STORE_PATH, metavar="PATH",
+        help=f"local library database used by --incremental (default: {DEFAULT_STORE_PATH})",
+    )
+    parser.add_argument(
+        "--raw-format", choices=RAW_FORMATS, default="json",
+        help="how raw API responses are archived in ./raw_data (default: json)",
+    )
+    parser.add_argument(
+        "--no-raw", action="store_true",
+        help="don't archive raw API responses",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="continue an interrupted export, reusing the pages it already saved in ./raw_data",
+    )
+    parser.add_argument(
+        "--from-raw", metavar="DIR",
+        help="rebuild the exports from a saved raw_data directory without logging in",
+    )
+    parser.add_argument(
+        "--formats", default=",".join(DEFAULT_FORMATS), metavar="LIST",
+        help=f"comma-separated export formats to write, from {','.join(EXPORT_FORMATS)} "
+             f"(default: {','.join(DEFAULT_FORMATS)}; parquet needs pyarrow)",
+    )
+    parser.add_argument(
+        "--llm-token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, metavar="N",
+        help=f"estimated tokens per shard of the llm export (default: {DEFAULT_TOKEN_BUDGET})",
+    )
+    parser.add_argument(
+        "--llm-description-words", type=int, metavar="N",
+        help="truncate descriptions in the llm export to N words",
+    )
+    parser.add_argument(
+        "--metrics", metavar="PATH",
+        help="write per-stage timings and request statistics to PATH as JSON and print a summary",
+    )
+    parser.add_argument(
+        "--cache", default=DEFAULT_CACHE_PATH, metavar="PATH",
+        help=f"HTTP cache used to revalidate unchanged pages instead of downloading them (default: {DEFAULT_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="don't use or update the HTTP cache",
+    )
+    parser.add_argument(
+        "--covers", action="store_true",
+        help="download cover images and point the exports at the local files",
+    )
+    parser.add_argument(
+        "--covers-dir", metavar="DIR",
+        help=f"content-addressed cover store (default: outputs/{DEFAULT_COVERS_DIRNAME}, "
+             f"or {DEFAULT_COVERS_DIRNAME}/ in the --batch-dir or --replay-all directory shared by all accounts); implies --covers",
+    )
+    parser.add_argument(
+        "--cover-concurrency", type=int, default=DEFAULT_COVER_CONCURRENCY, metavar="N",
+        help=f"cover downloads in flight at once (default: {DEFAULT_COVER_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--fresh-login", action="store_true",
+        help="ignore the cached session and log in through the browser again",
+    )
+    parser.add_argument(
+        "--replay-all", metavar="DIR",
+        help="rebuild the exports of every account archived under DIR (one <name>/raw_data each, "
+             "as --batch leaves them) on a pool of --jobs worker processes, without logging in",
+    )
+    parser.add_argument(
+        "--batch", metavar="MANIFEST",
+        help="export every account listed in a JSON manifest, concurrently, in one process",
+    )
+    parser.add_argument(
+        "--batch-dir", default=DEFAULT_BATCH_DIR, metavar="DIR",
+        help=f"where --batch writes each account's outputs, raw data and databases (default: {DEFAULT_BATCH_DIR}/<name>)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, metavar="N",
+        help="accounts exported at once with --batch (default: 4), "
+             "or worker processes for --replay-all (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--max-connections", type=int, default=20, metavar="N",
+        help="size of the connection pool shared by all accounts with --batch (default: 20)",
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.llm_token_budget < 1:
+        parser.error("--llm-token-budget must be at least 1")
+    if args.jobs is None:
+        args.jobs = (os.cpu_count() or 1) if args.replay_all else 4
+    if args.jobs < 1 or args.max_connections < 1:
+        parser.error("--jobs and --max-connections must be at least 1")
+    if args.resume and args.no_raw:
+        parser.error("--resume needs the raw archive; it can't be combined with --no-raw")
+    if sum(bool(mode) for mode in (args.from_raw, args.replay_all, args.batch)) > 1:
+        parser.error("--from-raw, --replay-all and --batch can't be combined")
+    if args.resume and (args.from_raw or args.replay_all):
+        parser.error("--resume can't be combined with --from-raw or --replay-all")
+    if args.cover_concurrency < 1:
+        parser.error("--cover-concurrency must be at least 1")
+    if args.covers and not args.covers_dir:
+        if args.batch:
+            base = Path(args.batch_dir)
+        elif args.replay_all:
+            base = Path(args.replay_all)
+        else:
+            base = Path("outputs")
+        args.covers_dir = str(base / DEFAULT_COVERS_DIRNAME)
+    args.formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in args.formats if f not in EXPORT_FORMATS]
+    if unknown or not args.formats:
+        parser.error(f"--formats must be a comma-separated list of: {', '.join(EXPORT_FORMATS)}")
+    return args
+
+def parse_query_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fable-export query",
+        description="Search an exported library using the index written next to the export.",
+        epilog="example: fable-export query --trope enemies-to-lovers --min-rating 5 --finished-in 2024",
+    )
+    parser.add_argument("text", nargs="*", help="full-text search over titles, authors, series, descriptions and reviews")
+    parser.add_argument(
+        "--index", default=str(Path("outputs") / DEFAULT_INDEX_FILENAME), metavar="PATH",
+        help=f"index to search (default: outputs/{DEFAULT_INDEX_FILENAME})",
+    )
+    for kind, flag in (("trope", "--trope"), ("mood", "--mood"), ("genre", "--genre"), ("subject", "--subject"),
+                       ("author", "--author"), ("list", "--list"), ("warning", "--warning")):
+        parser.add_argument(flag, dest=kind, action="append", default=[], metavar="VALUE",
+                            help=f"only books with this {kind} (repeat to require several)")
+    parser.add_argument("--status", help="reading status or list name, e.g. finished, reading, 'Want to Read'")
+    parser.add_argument("--favorite", action="store_true", help="only favorites")
+    parser.add_argument("--min-rating", type=float, metavar="N")
+    parser.add_argument("--max-rating", type=float, metavar="N")
+    parser.add_argument("--finished-in", metavar="YEAR", help="finished during YEAR (or YYYY-MM)")
+    parser.add_argument("--finished-after", metavar="DATE", help="finished on or after DATE (ISO, e.g. 2024-06)")
+    parser.add_argument("--finished-before", metavar="DATE", help="finished before DATE (ISO)")
+    parser.add_argument("--limit", type=int, metavar="N")
+    parser.add_argument("--json", action="store_true", help="print matches as JSON")
+    return parser.parse_args(argv)
+
+def _next_period(period: str) -> str:
+    """The ISO prefix right after a YYYY or YYYY-MM period."""
+    if len(period) == 4:
+        return f"{int(period) + 1:04d}"
+    year, month = int(period[:4]), int(period[5:7])
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+def run_query(args) -> int:
+    import json
+    import time
+
+    from .index import FACET_KINDS, LibraryIndex
+
+    if not Path(args.index).exists():
+        print(f"No index at {args.index}; run an export first (or pass --index).", file=sys.stderr)
+        return 1
+    finished_after, finished_before = args.finished_after, args.finished_before
+    if args.finished_in:
+        if not re.fullmatch(r"\d{4}(-(0[1-9]|1[0-2]))?", args.finished_in):
+            print("--finished-in must be YYYY or YYYY-MM", file=sys.stderr)
+            return 2
+        finished_after, finished_before = args.finished_in, _next_period(args.finished_in)
+
+    start = time.perf_counter()
+    index = LibraryIndex(args.index)
+    try:
+        rows = index.query(
+            text=" ".join(args.text) or None,
+            facets={kind: getattr(args, kind) for kind in FACET_KINDS if getattr(args, kind)},
+            status=args.status,
+            favorite=True if args.favorite else None,
+            min_rating=args.min_rating,
+            max_rating=args.max_rating,
+            finished_after=finished_after,
+            finished_before=finished_before,
+            limit=args.limit,
+        )
+    finally:
+        index.close()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return 0
+    for row in rows:
+        rating = f"{row['rating']:g}★" if row["rating"] is not None else "-"
+        finished = (row["finished_at"] or "")[:10]
+        series = f" ({row['series']})" if row["series"] else ""
+        print(f"{rating:>5}  {finished:<10}  {row['title']}{series} — {row['authors']}  [{row['list_name'] or row['status']}]")
+    print(f"{len(rows)} book{'s' if len(rows) != 1 else ''} ({elapsed_ms:.1f} ms)", file=sys.stderr)
+    return 0
 
 def main():
+    argv = sys.argv[1:]
+    if argv[:1] == ["query"]:
+        sys.exit(run_query(parse_query_args(argv[1:])))
+    args = parse_args(argv)
     print_header()
     try:
-        asyncio.run(run_export())
+        if args.from_raw:
+            run_replay(
+                args.from_raw,
+                formats=args.formats,
+                llm_token_budget=args.llm_token_budget,
+                llm_description_words=args.llm_description_words,
+                metrics_path=args.metrics,
+                covers_dir=args.covers_dir,
+            )
+        elif args.replay_all:
+            ok = run_replay_all(
+                args.replay_all,
+                args.jobs,
+                formats=args.formats,
+                llm_token_budget=args.llm_token_budget,
+                llm_description_words=args.llm_description_words,
+                metrics_path=args.metrics,
+                covers_dir=args.covers_dir,
+            )
+            if not ok:
+                sys.exit(1)
+        elif args.batch:
+            import asyncio
+
+            ok = asyncio.run(run_batch(
+                args.batch,
+                args.batch_dir,
+                jobs=args.jobs,
+                max_connections=args.max_connections,
+                concurrency=args.concurrency,
+                incremental=args.incremental,
+                raw_format=None if args.no_raw else args.raw_format,
+                formats=args.formats,
+                llm_token_budget=args.llm_token_budget,
+                llm_description_words=args.llm_description_words,
+                metrics_path=args.metrics,
+                fresh_login=args.fresh_login,
+                use_cache=not args.no_cache,
+                covers_dir=args.covers_dir,
+                cover_concurrency=args.cover_concurrency,
+                resume=args.resume,
+            ))
+            if not ok:
+                sys.exit(1)
+        else:
+            import asyncio
+
+            asyncio.run(run_export(
+                concurrency=args.concurrency,
+                incremental=args.incremental,
+                store_path=args.store,
+                raw_format=None if args.no_raw else args.raw_format,
+                formats=args.formats,
+                llm_token_budget=args.llm_token_budget,
+                llm_description_words=args.llm_description_words,
+                metrics_path=args.metrics,
+                fresh_login=args.fresh_login,
+                cache_path=None if args.no_cache else args.cache,
+                covers_dir=args.covers_dir,
+                cover_concurrency=args.cover_concurrency,
+                resume=args.resume,
+            ))
     except Exception as e:
         cause = e.__cause__ or e
+        console = get_console()
         console.print(f"[bold red]Error:[/bold red] {e}")
         if cause is not e:
             console.print(f"[red]Caused by:[/red] {cause}")
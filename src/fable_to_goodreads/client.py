@@ -1,233 +1,394 @@
 import asyncio
-import json
 import logging
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Iterable, Tuple
 
 import httpx
-from .models import Author, Book, SeriesInfo, CommunityRatings, ReadingProgress
+from .archive import RawArchive
+from .checkpoint import CrawlCheckpoint, open_checkpoint
+from .httpcache import DEFAULT_CACHE_MAX_BYTES, CacheEntry, HttpCache
+from .metrics import Metrics
+from .ratelimit import RETRY_STATUSES, AdaptiveLimiter, backoff_delay, retry_after_seconds
+from . import parsing
+from .models import Book
 
 logger = logging.getLogger(__name__)
 
 class FableClient:
     BASE_URL = "https://api.fable.co/api"
-    
-    def __init__(self, user_id: str, auth_token: str):
+    REVIEWS_PAGE_SIZE = 50
+    LIST_PAGE_SIZE = 100
+    DEFAULT_HEADERS = {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "User-Agent": "FableExporter/2.0 (Modern Modern Modern)",
+    }
+
+    @classmethod
+    def make_pool(
+        cls,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout: float = 30.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> httpx.AsyncClient:
+        """
+        A connection pool that several FableClients (e.g. one per account) can
+        share via `session=`. The auth header is sent per request, so the pool
+        itself carries no credentials.
+        """
+        return httpx.AsyncClient(
+            headers=cls.DEFAULT_HEADERS,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            transport=transport,
+        )
+
+    def __init__(
+        self,
+        user_id: str,
+        auth_token: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout: float = 30.0,
+        http2: bool = True,
+        page_concurrency: int = 8,
+        raw_dir: str = "raw_data",
+        raw_format: Optional[str] = "json",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        metrics: Optional[Metrics] = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        reauthenticate: Optional[Callable[[], Awaitable[str]]] = None,
+        cache_path: Optional[str] = None,
+        cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        session: Optional[httpx.AsyncClient] = None,
+        resume: bool = False,
+    ):
         self.user_id = user_id
         self.auth_token = auth_token.replace("JWT ", "").replace("Token ", "")
-        self.headers = {
-            "Authorization": f"JWT {self.auth_token}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "User-Agent": "FableExporter/2.0 (Modern Modern Modern)",
-        }
-        self.raw_dir = Path("raw_data")
-        self.raw_dir.mkdir(exist_ok=True)
-
-    def _save_raw(self, name: str, data: Any):
-        path = self.raw_dir / f"{name}.json"
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        self.headers = {"Authorization": f"JWT {self.auth_token}", **self.DEFAULT_HEADERS}
+        self.raw_dir = Path(raw_dir)
+        # Pages are journalled as the archive saves them; `resume` reads back an interrupted crawl's pages
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        self._resumed: Dict[str, Any] = {}
+        self.resumed_pages = 0
+        if raw_format:
+            self.checkpoint, self._resumed = open_checkpoint(
+                raw_dir, user_id, {"reviews": self.REVIEWS_PAGE_SIZE, "list": self.LIST_PAGE_SIZE}, resume
+            )
+        elif resume:
+            raise ValueError("Resuming needs the raw archive, which holds the pages already fetched")
+        self.archive = RawArchive(raw_dir, raw_format, on_saved=self.checkpoint.record) if raw_format else None
+        self.cache = HttpCache(cache_path, cache_max_bytes) if cache_path else None
+
+        self.http2 = http2
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout = timeout
+        self.page_concurrency = page_concurrency
+        self.transport = transport
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_connections = max_connections
+        self.limiter: Optional[AdaptiveLimiter] = None
+        # Called on a 401 to log in again; returns a fresh auth token
+        self.reauthenticate = reauthenticate
+        self._auth_lock: Optional[asyncio.Lock] = None
+        # A session passed in is shared with other clients and left open by aclose()
+        self._session = session
+        self._owns_session = session is None
+        self._page_semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "FableClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def open(self):
+        """Open the connection pool used by every request (unless one was passed in)."""
+        if self._session is None:
+            self._session = self.make_pool(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                timeout=self.timeout,
+                http2=self.http2,
+                transport=self.transport,
+            )
+            self._owns_session = True
+        if self.limiter is None:
+            self._page_semaphore = asyncio.Semaphore(self.page_concurrency)
+            self._auth_lock = asyncio.Lock()
+            self.limiter = AdaptiveLimiter(
+                initial=min(self.page_concurrency, self.max_connections), maximum=self.max_connections
+            )
+
+    async def aclose(self):
+        if self._session is not None and self._owns_session:
+            await self._session.aclose()
+            self._session = None
+        if self.archive is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.archive.close)
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        if self._session is None:
+            raise RuntimeError("FableClient session is not open; use 'async with FableClient(...)'.")
+        return self._session
+
+    async def _get(self, url: str) -> httpx.Response:
+        """
+        GET with retries: 429s, 5xx responses and transport errors are retried
+        with jittered exponential backoff (or the server's Retry-After), while
+        the adaptive limiter backs off on 429s and ramps up on success.
+
+        With an HTTP cache, the request is made conditional on the cached
+        validators and a 304 is answered with the cached body.
+        """
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        conditional = cached.validators() if cached is not None else {}
+        attempt = 0
+        reauthenticated = False
+        while True:
+            resp = None
+            error: Optional[httpx.TransportError] = None
+            token = self.auth_token
+            async with self.limiter.slot():
+                start = time.perf_counter()
+                try:
+                    resp = await self.session.get(
+                        url, headers={"Authorization": self.headers["Authorization"], **conditional}
+                    )
+                except httpx.TransportError as e:
+                    error = e
+                else:
+                    if self.metrics is not None:
+                        self.metrics.record_request(url, resp.status_code, len(resp.content), time.perf_counter() - start)
+                    if resp.status_code == 429:
+                        self.limiter.on_throttle()
+                    elif resp.status_code < 500:
+                        self.limiter.on_success()
+
+            if resp is not None and resp.status_code == 401 and not reauthenticated:
+                reauthenticated = True
+                if await self._refresh_auth(token):
+                    continue
+            if resp is not None and resp.status_code not in RETRY_STATUSES:
+                return self._through_cache(url, resp, cached)
+            if attempt >= self.max_retries:
+                if error is not None:
+                    raise error
+                return resp
+
+            delay = retry_after_seconds(resp) if resp is not None else None
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            reason = f"HTTP {resp.status_code}" if resp is not None else repr(error)
+            logger.info("Retrying %s in %.1fs after %s (attempt %d/%d)", url, delay, reason, attempt + 1, self.max_retries)
+            if self.metrics is not None:
+                self.metrics.record_retry(url)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _through_cache(self, url: str, resp: httpx.Response, cached: Optional[CacheEntry]) -> httpx.Response:
+        if self.cache is None:
+            return resp
+        if resp.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            headers = {"content-type": cached.content_type} if cached.content_type else None
+            return httpx.Response(200, headers=headers, content=cached.body, request=resp.request)
+        if resp.status_code == 200 and "no-store" not in resp.headers.get("cache-control", ""):
+            self.cache.store(
+                url, resp.headers.get("etag"), resp.headers.get("last-modified"),
+                resp.headers.get("content-type"), resp.content,
+            )
+        return resp
+
+    def set_auth_token(self, auth_token: str):
+        self.auth_token = auth_token.replace("JWT ", "").replace("Token ", "")
+        self.headers["Authorization"] = f"JWT {self.auth_token}"
+
+    async def _refresh_auth(self, stale_token: str) -> bool:
+        """Swap in a fresh token after a 401. Concurrent 401s share a single re-login."""
+        if self.reauthenticate is None:
+            return False
+        async with self._auth_lock:
+            if self.auth_token != stale_token:
+                return True
+            logger.info("Auth token rejected, logging in again")
+            self.set_auth_token(await self.reauthenticate())
+        return True
+
+    async def validate_session(self) -> bool:
+        """One cheap authenticated call to check the current token is accepted."""
+        resp = await self._get(f"{self.BASE_URL}/settings/profile")
+        return resp.status_code == 200
+
+    async def _save_raw(self, name: str, data: Any):
+        if self.archive is not None:
+            await self.archive.asave(name, data)
+
+    def _resumed_page(self, name: str) -> Optional[Dict[str, Any]]:
+        """A page saved by the interrupted crawl being resumed, if it got that far."""
+        page = self._resumed.pop(name, None)
+        if page is not None:
+            self.resumed_pages += 1
+        return page
+
+    def finish_checkpoint(self):
+        """Call once the crawl has completed, so a later `resume` starts from scratch."""
+        if self.checkpoint is not None:
+            self.checkpoint.finish()
+
+    async def _paginate(
+        self,
+        fetch_page: Callable[[int], Awaitable[Dict[str, Any]]],
+        limit: int,
+        stop: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (offset, page) pairs in offset order. When the first page reports
+        a total `count`, the remaining offsets are fetched in parallel;
+        otherwise pages are walked one after another.
+
+        If `stop` is given, pages are always walked sequentially and the walk
+        ends after the first page for which `stop(page)` is true.
+        """
+        async def fetch_limited(offset: int) -> Dict[str, Any]:
+            async with self._page_semaphore:
+                return await fetch_page(offset)
+
+        def is_last(page: Dict[str, Any]) -> bool:
+            results = page.get("results", [])
+            return not results or len(results) < limit or (stop is not None and stop(page))
+
+        page = await fetch_page(0)
+        yield 0, page
+        if is_last(page):
+            return
+
+        offset = limit
+        total = page.get("count")
+        if stop is None and isinstance(total, int) and total > limit:
+            offsets = list(range(limit, total, limit))
+            tasks = [asyncio.ensure_future(fetch_limited(o)) for o in offsets]
+            try:
+                for o, task in zip(offsets, tasks):
+                    page = await task
+                    yield o, page
+                    if is_last(page):
+                        return
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            # The library may have grown since the first page was served.
+            offset = offsets[-1] + limit
+
+        while True:
+            page = await fetch_page(offset)
+            yield offset, page
+            if is_last(page):
+                return
+            offset += limit
+
+    async def _fetch_reviews_page(self, offset: int) -> Dict[str, Any]:
+        page = self._resumed_page(f"reviews_{offset}")
+        if page is not None:
+            return page
+        limit = self.REVIEWS_PAGE_SIZE
+        url = f"{self.BASE_URL}/v2/users/{self.user_id}/reviews/?limit={limit}&offset={offset}"
+        resp = await self._get(url)
+        if resp.status_code == 404:
+            url = f"{self.BASE_URL}/users/{self.user_id}/reviews/?limit={limit}&offset={offset}"
+            resp = await self._get(url)
+        
+        resp.raise_for_status()
+        data = resp.json()
+        await self._save_raw(f"reviews_{offset}", resp.content)
+        return data
+
+    async def iter_review_pages(self) -> AsyncIterator[Dict[str, Any]]:
+        async for _, data in self._paginate(self._fetch_reviews_page, self.REVIEWS_PAGE_SIZE):
+            yield data
 
     async def fetch_reviews(self) -> Dict[str, Dict[str, Any]]:
         reviews = {}
-        async with httpx.AsyncClient(headers=self.headers) as client:
-            offset = 0
-            while True:
-                url = f"{self.BASE_URL}/v2/users/{self.user_id}/reviews/?limit=50&offset={offset}"
-                resp = await client.get(url)
-                if resp.status_code == 404:
-                    url = f"{self.BASE_URL}/users/{self.user_id}/reviews/?limit=50&offset={offset}"
-                    resp = await client.get(url)
-                
-                resp.raise_for_status()
-                data = resp.json()
-                self._save_raw(f"reviews_{offset}", data)
-                
-                results = data.get("results", [])
-                for r in results:
-                    if isinstance(r, dict):
-                        book_data = r.get("book", {})
-                        if isinstance(book_data, dict):
-                            book_id = book_data.get("id")
-                            if book_id:
-                                reviews[book_id] = r
-                
-                if not results or len(results) < 50:
-                    break
-                offset += 50
+        async for data in self.iter_review_pages():
+            self.index_reviews(data, reviews)
         return reviews
 
+    @staticmethod
+    def index_reviews(data: Dict[str, Any], reviews: Dict[str, Dict[str, Any]]):
+        """Add the reviews of one raw reviews page to `reviews`, keyed by book id."""
+        parsing.index_reviews(data, reviews)
+
     async def fetch_lists(self) -> List[Dict[str, Any]]:
-        async with httpx.AsyncClient(headers=self.headers) as client:
-            url = f"{self.BASE_URL}/v2/users/{self.user_id}/book_lists"
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            self._save_raw("user_lists", data)
-            return data.get("results", [])
-
-    async def fetch_books_from_list(self, list_id: str, list_name: str) -> List[Dict[str, Any]]:
+        url = f"{self.BASE_URL}/v2/users/{self.user_id}/book_lists"
+        resp = await self._get(url)
+        resp.raise_for_status()
+        data = resp.json()
+        await self._save_raw("user_lists", resp.content)
+        return data.get("results", [])
+
+    async def _fetch_list_page(self, list_id: str, offset: int) -> Dict[str, Any]:
+        # Pages are saved by list id, since two lists can share a name
+        page = self._resumed_page(f"list_{list_id}_{offset}")
+        if page is not None:
+            return page
+        limit = self.LIST_PAGE_SIZE
+        url = f"{self.BASE_URL}/v2/users/{self.user_id}/book_lists/{list_id}/books?limit={limit}&offset={offset}"
+        resp = await self._get(url)
+        resp.raise_for_status()
+        data = resp.json()
+        await self._save_raw(f"list_{list_id}_{offset}", resp.content)
+        return data
+
+    async def iter_list_pages(
+        self,
+        list_id: str,
+        list_name: str,
+        stop: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the items of each page of a list, tagged with `_list_name`, in order."""
+        fetch_page = lambda offset: self._fetch_list_page(list_id, offset)
+        async for _, data in self._paginate(fetch_page, self.LIST_PAGE_SIZE, stop):
+            results = data.get("results", [])
+            for r in results:
+                r["_list_name"] = list_name
+            yield results
+
+    async def fetch_books_from_list(
+        self,
+        list_id: str,
+        list_name: str,
+        stop: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
         books = []
-        async with httpx.AsyncClient(headers=self.headers) as client:
-            offset = 0
-            while True:
-                url = f"{self.BASE_URL}/v2/users/{self.user_id}/book_lists/{list_id}/books?limit=100&offset={offset}"
-                resp = await client.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-                self._save_raw(f"list_{list_name}_{offset}", data)
-                
-                results = data.get("results", [])
-                for r in results:
-                    r["_list_name"] = list_name
-                books.extend(results)
-                
-                if not results or len(results) < 100:
-                    break
-                offset += 100
+        async for results in self.iter_list_pages(list_id, list_name, stop):
+            books.extend(results)
         return books
 
-    def parse_book(self, item: Dict[str, Any], reviews: Dict[str, Any]) -> Optional[Book]:
-        if not item or not isinstance(item, dict):
-            return None
-
-        raw_book = item.get("book", item)
-        if not raw_book or not isinstance(raw_book, dict):
-            return None
-
-        book_id = raw_book.get("id")
-        if not book_id:
-            return None
-
-        review = reviews.get(book_id, {})
-        if not isinstance(review, dict):
-            review = {}
-
-        # Series
-        series_sets = raw_book.get("bookseries_set", [])
-        series = None
-        if series_sets and isinstance(series_sets, list):
-            s = series_sets[0]
-            if isinstance(s, dict):
-                series_obj = s.get("book_series", {})
-                series = SeriesInfo(
-                    name=series_obj.get("name", "") if isinstance(series_obj, dict) else "",
-                    position=str(s.get("position", ""))
-                )
-
-        # Ratings — these are the user's own sub-ratings from the reviews endpoint
-        comm_ratings = CommunityRatings(
-            average=review.get("rating"),
-            characters=review.get("characters_rating"),
-            plot=review.get("plot_rating"),
-            writing=review.get("writing_style_rating"),
-            setting=review.get("setting_rating"),
-        )
+    @staticmethod
+    def parse_book(item: Dict[str, Any], reviews: Dict[str, Any]) -> Optional[Book]:
+        return parsing.parse_book(item, reviews)
 
-        # ISBN
-        isbn = raw_book.get("isbn", "") or ""
-        isbn10 = isbn if len(isbn) == 10 else ""
-        isbn13 = isbn if len(isbn) == 13 else ""
-
-        # Status — authoritative source is reading_progress.status
-        reading_progress_raw = raw_book.get("reading_progress") or {}
-        if not isinstance(reading_progress_raw, dict):
-            reading_progress_raw = {}
-        status = reading_progress_raw.get("status") or item.get("status") or raw_book.get("status") or "unread"
-
-        reading_progress = ReadingProgress(
-            current_percentage=reading_progress_raw.get("current_percentage"),
-            current_page=reading_progress_raw.get("current_page"),
-            page_count=reading_progress_raw.get("page_count"),
-            status=reading_progress_raw.get("status"),
-        ) if reading_progress_raw else None
-
-        # Dates
-        started_at = raw_book.get("started_reading_at") or ""
-        finished_at = raw_book.get("finished_reading_at") or ""
-        if not finished_at and status.lower() in ["finished", "read"]:
-            finished_at = review.get("created_at") or review.get("updated_at") or ""
-
-        # Authors
-        raw_authors = raw_book.get("authors", [])
-        authors = []
-        if isinstance(raw_authors, list):
-            for a in raw_authors:
-                if isinstance(a, dict):
-                    name = a.get("name")
-                    if name:
-                        authors.append(Author(
-                            name=name,
-                            slug=a.get("slug"),
-                            biography=a.get("biography", ""),
-                        ))
-                elif isinstance(a, str):
-                    authors.append(Author(name=a))
-
-        # Tags
-        storygraph_tags = raw_book.get("storygraph_tags") or {}
-        if not isinstance(storygraph_tags, dict):
-            storygraph_tags = {}
-
-        moods = storygraph_tags.get("moods")
-        if not isinstance(moods, list): moods = []
-
-        cw = storygraph_tags.get("content_warnings")
-        if not isinstance(cw, list): cw = []
-
-        tropes = raw_book.get("tropes")
-        if not isinstance(tropes, list):
-            tropes = []
-
-        # Subjects — list of lists, flatten to "Fiction > Literary" style strings
-        raw_subjects = raw_book.get("subjects") or []
-        subjects = [" > ".join(s) for s in raw_subjects if isinstance(s, list)]
-
-        return Book(
-            id=book_id,
-            title=raw_book.get("title", "Unknown"),
-            subtitle=raw_book.get("subtitle") or "",
-            authors=authors,
-            isbn=isbn,
-            isbn10=isbn10,
-            isbn13=isbn13,
-            display_isbn=raw_book.get("display_isbn") or "",
-            publisher=raw_book.get("imprint") or raw_book.get("publisher") or "",
-            page_count=raw_book.get("page_count"),
-            chapter_count=raw_book.get("chapter_count"),
-            published_date=raw_book.get("published_date") or "",
-            description=raw_book.get("description") or "",
-            cover_image=raw_book.get("cover_image") or "",
-            cover_image_small=raw_book.get("cover_image_small") or "",
-            background_color=raw_book.get("background_color") or "",
-            fable_url=raw_book.get("url") or "",
-            source=raw_book.get("source") or "",
-            price_usd=raw_book.get("price_usd") or "",
-            non_fiction=raw_book.get("non_fiction"),
-            family_id=raw_book.get("family_id"),
-            is_free=raw_book.get("is_free"),
-            can_purchase=raw_book.get("can_purchase"),
-            can_download=raw_book.get("can_download"),
-            store_availability=raw_book.get("store_availability") or "",
-            is_out_of_catalog=raw_book.get("is_out_of_catalog"),
-            genres=[g.get("name") for g in raw_book.get("genres", []) if isinstance(g, dict) and g.get("name")],
-            subjects=subjects,
-            moods=moods,
-            content_warnings=cw,
-            tropes=tropes,
-            series=series,
-            status=status,
-            my_rating=review.get("rating"),
-            my_review=review.get("review") or "",
-            started_at=started_at,
-            started_at_date_type=raw_book.get("started_reading_date_type") or "",
-            finished_at=finished_at,
-            finished_at_date_type=raw_book.get("finished_reading_date_type") or "",
-            date_added=review.get("created_at") or raw_book.get("created_at") or "",
-            list_name=item.get("_list_name") or "",
-            favorite=item.get("favorite"),
-            sort_value=item.get("sort_value"),
-            reading_progress=reading_progress,
-            community_ratings=comm_ratings,
-        )
\ No newline at end of file
+    @staticmethod
+    def parse_books(items: Iterable[Dict[str, Any]], reviews: Dict[str, Any]) -> List[Book]:
+        return parsing.parse_books(items, reviews)
@@ -0,0 +1,125 @@
+"""
+Arrow schema and record conversion for the Parquet export.
+
+pyarrow is an optional dependency (`pip install "fable-to-goodreads[parquet]"`)
+and is only imported when a columnar export is actually requested.
+"""
+from __future__ import annotations
+
+import typing
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .models import Book
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Bumped whenever the column layout changes, and stored in the file metadata
+SCHEMA_VERSION = "1"
+
+# Strings with few distinct values across a library, stored dictionary-encoded
+# (for list fields, the list elements are)
+DICTIONARY_FIELDS = {
+    "publisher", "source", "store_availability", "status", "list_name",
+    "started_at_date_type", "finished_at_date_type", "background_color",
+    "genres", "subjects", "moods", "content_warnings", "tropes",
+    "lists.name", "reading_progress.status", "series.name",
+}
+
+# ISO 8601 strings stored as UTC timestamps / calendar dates. Values that
+# don't parse (e.g. a bare year) become null.
+TIMESTAMP_FIELDS = {"started_at", "finished_at", "date_added"}
+DATE_FIELDS = {"published_date"}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "The parquet export needs pyarrow: pip install \"fable-to-goodreads[parquet]\""
+        ) from e
+    return pyarrow
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _arrow_type(pa, annotation: Any, path: str) -> "pa.DataType":
+    annotation = _unwrap_optional(annotation)
+    if path in TIMESTAMP_FIELDS:
+        return pa.timestamp("us", tz="UTC")
+    if path in DATE_FIELDS:
+        return pa.date32()
+    if typing.get_origin(annotation) in (list, List):
+        (item,) = typing.get_args(annotation)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return pa.list_(_struct_type(pa, item, path))
+        return pa.list_(_arrow_type(pa, item, path))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _struct_type(pa, annotation, path)
+    if annotation is str:
+        return pa.dictionary(pa.int32(), pa.string()) if path in DICTIONARY_FIELDS else pa.string()
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    raise TypeError(f"No Arrow type for field '{path}' ({annotation!r})")
+
+
+def _struct_type(pa, model: type, prefix: str) -> "pa.DataType":
+    return pa.struct([
+        pa.field(name, _arrow_type(pa, info.annotation, f"{prefix}.{name}"))
+        for name, info in model.model_fields.items()
+    ])
+
+
+def book_schema() -> "pa.Schema":
+    """Arrow schema with one column per `Book` field, in model order."""
+    pa = import_pyarrow()
+    return pa.schema(
+        [pa.field(name, _arrow_type(pa, info.annotation, name)) for name, info in Book.model_fields.items()],
+        metadata={"fable_to_goodreads.schema_version": SCHEMA_VERSION},
+    )
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def book_record(book: Book) -> Dict[str, Any]:
+    """A Book as a plain dict matching `book_schema()`."""
+    record = book.model_dump()
+    for name in TIMESTAMP_FIELDS:
+        record[name] = _timestamp(record[name])
+    for name in DATE_FIELDS:
+        record[name] = _date(record[name])
+    return record
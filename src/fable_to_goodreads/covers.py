@@ -0,0 +1,231 @@
+"""
+Downloaded cover images, stored by content.
+
+Each image is saved once as `<sha256><ext>` (under a two-character fan-out
+directory), however many books, URLs or accounts share it. `index.json` maps
+every downloaded URL to its file, so re-runs skip cached covers without
+touching the network. Several accounts can share one covers directory.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+    from .metrics import Metrics
+    from .models import Book
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COVERS_DIRNAME = "covers"
+DEFAULT_COVER_CONCURRENCY = 16
+
+# Cover requests are grouped under one metrics endpoint rather than one per file
+COVERS_ENDPOINT = "/covers"
+
+_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/avif": ".avif",
+}
+
+
+def cover_url(book: Book) -> str:
+    return book.cover_image or book.cover_image_small or ""
+
+
+def _extension(url: str, content_type: Optional[str]) -> str:
+    ext = _EXTENSIONS.get((content_type or "").split(";")[0].strip().lower())
+    if ext:
+        return ext
+    suffix = Path(url.split("?", 1)[0]).suffix.lower()
+    return suffix if suffix in _EXTENSIONS.values() or suffix == ".jpeg" else ".img"
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class CoverStore:
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.directory / "index.json"
+        self.files: Dict[str, str] = self._read_index()
+        self._dirty = False
+
+    def _read_index(self) -> Dict[str, str]:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """The cached file for `url`, if it was downloaded before and is still on disk."""
+        name = self.files.get(url)
+        if name is None:
+            return None
+        path = self.directory / name
+        return path if path.exists() else None
+
+    def add(self, url: str, content: bytes, content_type: Optional[str] = None) -> Path:
+        digest = hashlib.sha256(content).hexdigest()
+        name = f"{digest[:2]}/{digest}{_extension(url, content_type)}"
+        path = self.directory / name
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            _write_atomic(path, content)
+        self.files[url] = name
+        self._dirty = True
+        return path
+
+    def save(self):
+        """Write the URL index, keeping entries added meanwhile by other runs sharing the directory."""
+        if not self._dirty:
+            return
+        files = {**self._read_index(), **self.files}
+        _write_atomic(self._index_path, json.dumps(files, indent=2, sort_keys=True).encode("utf-8"))
+        self.files = files
+        self._dirty = False
+
+
+class CoverDownloader:
+    """
+    Fetches covers into a `CoverStore` over an existing connection pool, with
+    at most `concurrency` downloads in flight. One downloader can serve
+    several accounts at once: a URL already being downloaded is awaited
+    rather than fetched twice. A cover that can't be downloaded is logged and
+    skipped, never failing the export.
+    """
+
+    def __init__(
+        self,
+        session: httpx.AsyncClient,
+        store: CoverStore,
+        concurrency: int = DEFAULT_COVER_CONCURRENCY,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+    ):
+        self.session = session
+        self.store = store
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.downloaded = 0
+        self.cached = 0
+        self.failed = 0
+
+    async def download(
+        self,
+        urls: Iterable[str],
+        metrics: Optional[Metrics] = None,
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> Dict[str, Path]:
+        """Fetch every URL not cached yet; returns the local file of each URL that succeeded."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+
+        async def one(url: str):
+            path = await self.fetch(url, metrics)
+            if on_done:
+                on_done()
+            return path
+
+        try:
+            paths = await asyncio.gather(*(one(url) for url in urls))
+        finally:
+            self.store.save()
+        return {url: path for url, path in zip(urls, paths) if path is not None}
+
+    async def fetch(self, url: str, metrics: Optional[Metrics] = None) -> Optional[Path]:
+        path = self.store.lookup(url)
+        if path is not None:
+            self.cached += 1
+            return path
+        pending = self._pending.get(url)
+        if pending is None:
+            pending = self._pending[url] = asyncio.ensure_future(self._download(url, metrics))
+            pending.add_done_callback(lambda _: self._pending.pop(url, None))
+        # Shielded so that one account giving up doesn't cancel a download another is waiting on
+        return await asyncio.shield(pending)
+
+    async def _download(self, url: str, metrics: Optional[Metrics]) -> Optional[Path]:
+        import httpx
+
+        from .ratelimit import RETRY_STATUSES, backoff_delay, retry_after_seconds
+
+        attempt = 0
+        while True:
+            resp = None
+            error: Optional[httpx.TransportError] = None
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    resp = await self.session.get(url, headers={"Accept": "image/*"}, follow_redirects=True)
+                except httpx.TransportError as e:
+                    error = e
+                else:
+                    if metrics is not None:
+                        metrics.record_request(COVERS_ENDPOINT, resp.status_code, len(resp.content), time.perf_counter() - start)
+            if resp is not None and resp.status_code not in RETRY_STATUSES:
+                break
+            if attempt >= self.max_retries:
+                break
+            delay = retry_after_seconds(resp) if resp is not None else None
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            if metrics is not None:
+                metrics.record_retry(COVERS_ENDPOINT)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if resp is None or resp.status_code != 200 or not resp.content:
+            reason = f"HTTP {resp.status_code}" if resp is not None else repr(error)
+            logger.info("Could not download cover %s: %s", url, reason)
+            self.failed += 1
+            return None
+        self.downloaded += 1
+        return self.store.add(url, resp.content, resp.headers.get("content-type"))
+
+
+def attach_covers(books: List[Book], paths: Dict[str, Path], output_dir: Path) -> int:
+    """
+    Point each book's `cover_image_path` at its downloaded cover, relative to
+    `output_dir` so the export folder can be moved along with the covers.
+    Returns how many books got a cover.
+    """
+    attached = 0
+    for book in books:
+        path = paths.get(cover_url(book))
+        if path is None:
+            continue
+        book.cover_image_path = Path(os.path.relpath(path, output_dir)).as_posix()
+        attached += 1
+    return attached
+
+
+def attach_cached_covers(books: List[Book], store: CoverStore, output_dir: Path) -> int:
+    """Offline counterpart of `CoverDownloader`: link the covers `store` already has, download nothing."""
+    paths = {}
+    for url in map(cover_url, books):
+        path = store.lookup(url) if url else None
+        if path is not None:
+            paths[url] = path
+    return attach_covers(books, paths, output_dir)
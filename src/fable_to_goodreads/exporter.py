@@ -1,141 +1,600 @@
+from __future__ import annotations
+
 import csv
+import hashlib
 import json
+import time
+from collections import abc
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Sequence
 from datetime import datetime
-from .models import Book
+from .index import DEFAULT_INDEX_FILENAME, LibraryIndex, book_digest
+from .llm import DEFAULT_TOKEN_BUDGET, ShardWriter, truncate_words
+from .manifest import OutputManifest, format_fingerprint, library_fingerprint
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    from .models import Book
+
+GOODREADS_HEADERS = [
+    "Title", "Author", "ISBN", "My Rating", "Average Rating",
+    "Publisher", "Binding", "Year Published", "Original Publication Year",
+    "Date Read", "Date Added", "Shelves", "Bookshelves", "My Review"
+]
+
+MASTER_HEADERS = [
+    "Title", "Authors",
+    "Non Fiction", "Genres", "Subjects", "Moods", "Content Warnings", "Tropes",
+    "Series Name", "Series Position",
+    "Status", "Lists", "Favorite", "Finished At",
+    "My Rating (Overall)", "My Rating (Characters)",
+    "My Rating (Plot)", "My Rating (Writing)", "My Rating (Setting)",
+    "My Review", "Description", "Cover Image",
+]
+
+
+def shelf_name(name: str) -> str:
+    return name.lower().replace(" ", "-")
+
+
+def bookshelves(b: Book) -> str:
+    """Goodreads shelves for a book: every list it is on, then its genres."""
+    shelves = [shelf_name(m.name) for m in b.lists] + [shelf_name(g) for g in b.genres]
+    return " ".join(dict.fromkeys(shelves))
+
+
+def goodreads_row(b: Book) -> Dict[str, Any]:
+    # Validate ISBN
+    isbn = b.isbn or b.isbn13 or b.isbn10 or ""
+    if isbn:
+        clean_isbn = isbn.replace("-", "").replace(" ", "")
+        if not all(c.isdigit() or c.lower() == 'x' for c in clean_isbn):
+            isbn = ""
+
+    status = b.status.lower()
+    if status in ["finished", "read"]:
+        shelf = "read"
+        date_read = b.finished_at[:10] if b.finished_at else ""
+    elif status in ["reading", "current"]:
+        shelf = "currently-reading"
+        date_read = ""
+    else:
+        shelf = "to-read"
+        date_read = ""
+
+    return {
+        "Title": b.title,
+        "Author": ", ".join(a.name for a in b.authors),
+        "ISBN": isbn,
+        "My Rating": b.my_rating or "",
+        "Average Rating": b.community_ratings.average or "",
+        "Publisher": b.publisher,
+        "Binding": "Paperback",
+        "Year Published": b.published_date[:4] if b.published_date else "",
+        "Original Publication Year": b.published_date[:4] if b.published_date else "",
+        "Date Read": date_read,
+        "Date Added": b.date_added[:10] if b.date_added else "",
+        "Shelves": shelf,
+        "Bookshelves": bookshelves(b),
+        "My Review": b.my_review
+    }
+
+
+# Left out of the change detection of the delta CSV: the community average
+# moves all the time and isn't something a re-import needs
+DELTA_IGNORED_COLUMNS = ("Average Rating",)
+
+
+def goodreads_row_hash(row: Dict[str, Any]) -> str:
+    data = {k: v for k, v in row.items() if k not in DELTA_IGNORED_COLUMNS}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def master_row(b: Book) -> Dict[str, Any]:
+    return {
+        "Title": b.title,
+        "Authors": "; ".join(a.name for a in b.authors),
+        "Non Fiction": b.non_fiction if b.non_fiction is not None else "",
+        "Genres": "; ".join(b.genres),
+        "Subjects": "; ".join(b.subjects),
+        "Moods": "; ".join(b.moods),
+        "Content Warnings": "; ".join(b.content_warnings),
+        "Tropes": "; ".join(b.tropes),
+        "Series Name": b.series.name if b.series else "",
+        "Series Position": b.series.position if b.series else "",
+        "Status": b.list_name or "",
+        "Lists": "; ".join(m.name for m in b.lists),
+        "Favorite": b.favorite if b.favorite is not None else "",
+        "Finished At": b.finished_at[:10] if b.finished_at else "",
+        "My Rating (Overall)": b.community_ratings.average if b.community_ratings.average is not None else "",
+        "My Rating (Characters)": b.community_ratings.characters if b.community_ratings.characters is not None else "",
+        "My Rating (Plot)": b.community_ratings.plot if b.community_ratings.plot is not None else "",
+        "My Rating (Writing)": b.community_ratings.writing if b.community_ratings.writing is not None else "",
+        "My Rating (Setting)": b.community_ratings.setting if b.community_ratings.setting is not None else "",
+        "My Review": b.my_review or "",
+        "Description": b.description or "",
+        "Cover Image": b.cover_image_path or b.cover_image or "",
+    }
+
+
+def recommendation_record(b: Book) -> Dict[str, Any]:
+    record = {
+        "title": b.title,
+        "authors": [a.name for a in b.authors],
+        "status": b.list_name or b.status,
+        "lists": [m.name for m in b.lists] if len(b.lists) > 1 else None,
+        "rating": b.community_ratings.average,
+        "favorite": b.favorite,
+        "finished_at": b.finished_at[:10] if b.finished_at else None,
+        "non_fiction": b.non_fiction,
+        "genres": b.genres or None,
+        "moods": b.moods or None,
+        "tropes": b.tropes or None,
+        "content_warnings": b.content_warnings or None,
+        "series": {"name": b.series.name, "position": b.series.position} if b.series else None,
+        "review": b.my_review or None,
+        "description": b.description or None,
+    }
+    # Drop null/empty values to save tokens
+    return {k: v for k, v in record.items() if v is not None and v != [] and v != ""}
+
+
+class Sink:
+    """
+    One output file, written incrementally one book at a time. Books are only
+    read by attribute, so `Book` models and `library.BookRow` views both work.
+    """
+    name = ""
+    label = ""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def write(self, book: Book):
+        raise NotImplementedError
+
+    def close(self) -> Path:
+        return self.path
+
+    def abort(self) -> Path:
+        """Close after a failed export; sinks that finalise state on close can skip that here."""
+        return self.close()
+
+
+class JsonSink(Sink):
+    """Streams a JSON array, producing the same layout as json.dump(..., indent=2)."""
+    name = "json"
+    label = "Master JSON"
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._f = open(path, "w", encoding="utf-8")
+        self._count = 0
+
+    def write(self, book: Book):
+        body = json.dumps(book.model_dump(), indent=2, default=str).replace("\n", "\n  ")
+        self._f.write(("[\n  " if self._count == 0 else ",\n  ") + body)
+        self._count += 1
+
+    def close(self) -> Path:
+        self._f.write("\n]" if self._count else "[]")
+        self._f.close()
+        return self.path
+
+
+class CsvSink(Sink):
+    headers: List[str] = []
+    write_empty = True
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._f = None
+        self._writer = None
+        if self.write_empty:
+            self._open()
+
+    def _open(self):
+        self._f = open(self.path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._f, fieldnames=self.headers)
+        self._writer.writeheader()
+
+    def row(self, book: Book) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def write(self, book: Book):
+        self._write_row(self.row(book))
+
+    def _write_row(self, row: Dict[str, Any]):
+        if self._writer is None:
+            self._open()
+        self._writer.writerow(row)
+
+    def close(self) -> Path:
+        if self._f is not None:
+            self._f.close()
+        return self.path
+
+
+class GoodreadsCsvSink(CsvSink):
+    name = "goodreads"
+    label = "Goodreads CSV"
+    headers = GOODREADS_HEADERS
+    row = staticmethod(goodreads_row)
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        # Remembered in the manifest as the baseline of the next delta export
+        self.row_hashes: Dict[str, str] = {}
+
+    def write(self, book: Book):
+        row = self.row(book)
+        self.row_hashes[book.id] = goodreads_row_hash(row)
+        self._write_row(row)
+
+
+class GoodreadsDeltaSink(GoodreadsCsvSink):
+    """
+    Goodreads CSV with only the books that are new or whose row changed
+    (rating, dates, shelves, review...) since the last Goodreads export.
+    Nothing is written when nothing changed.
+    """
+    name = "goodreads-delta"
+    label = "Goodreads CSV (changes)"
+    write_empty = False
+
+    def __init__(self, path: Path, previous: Dict[str, str]):
+        super().__init__(path)
+        self.previous = previous
+        self.changed = 0
+
+    def write(self, book: Book):
+        row = self.row(book)
+        digest = self.row_hashes[book.id] = goodreads_row_hash(row)
+        if self.previous.get(book.id) != digest:
+            self.changed += 1
+            self._write_row(row)
+
+    def close(self) -> Optional[Path]:
+        super().close()
+        return self.path if self.changed else None
+
+
+class MasterCsvSink(CsvSink):
+    name = "master"
+    label = "Master CSV"
+    headers = MASTER_HEADERS
+    row = staticmethod(master_row)
+    # An empty library leaves any previous master list untouched
+    write_empty = False
+
+
+class RecommendationsSink(Sink):
+    name = "recommendations"
+    label = "Recommendations JSONL"
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, book: Book):
+        self._f.write(json.dumps(recommendation_record(book), ensure_ascii=False) + "\n")
+
+    def close(self) -> Path:
+        self._f.close()
+        return self.path
+
+
+class LlmSink(Sink):
+    """
+    Recommendation records with repeated strings swapped for vocabulary ids,
+    packed into token-budgeted shards (see `llm`). `path` is a directory.
+    """
+    name = "llm"
+    label = "LLM shards"
+
+    def __init__(self, path: Path, token_budget: int = DEFAULT_TOKEN_BUDGET, description_words: Optional[int] = None):
+        super().__init__(path)
+        self.description_words = description_words
+        self._shards = ShardWriter(path, token_budget, meta={"description_words": description_words})
+
+    def write(self, book: Book):
+        record = recommendation_record(book)
+        if self.description_words is not None and "description" in record:
+            record["description"] = truncate_words(record["description"], self.description_words)
+        self._shards.add(record)
+
+    def close(self) -> Path:
+        return self._shards.close()
+
+
+class IndexSink(Sink):
+    """
+    Keeps the query index (see `index`) in step with the export. Only books
+    whose content changed since the last export are rewritten, and books no
+    longer in the library are removed on close.
+    """
+    name = "index"
+    label = "Query index"
+
+    def __init__(self, path: Path, digests: Optional[Dict[str, str]] = None):
+        super().__init__(path)
+        # Content hashes the exporter already computed, by book id
+        self._digests = digests if digests is not None else {}
+        self._index = LibraryIndex(str(path))
+        self._hashes = self._index.hashes()
+        self._seen = set()
+
+    def write(self, book: Book):
+        self._seen.add(book.id)
+        digest = self._digests.get(book.id) or book_digest(book)
+        if self._hashes.get(book.id) != digest:
+            self._index.upsert(book, digest)
+
+    def close(self) -> Path:
+        try:
+            self._index.remove_missing(self._seen)
+            self._index.commit()
+        finally:
+            self._index.close()
+        return self.path
+
+    def abort(self) -> Path:
+        # Books not seen yet may still be in the library, so keep them
+        try:
+            self._index.commit()
+        finally:
+            self._index.close()
+        return self.path
+
+
+class ParquetSink(Sink):
+    """
+    Columnar export with list-typed and dictionary-encoded columns (see
+    `columnar`). Books are buffered and written one row group at a time.
+    Needs the optional pyarrow dependency.
+    """
+    name = "parquet"
+    label = "Parquet"
+    row_group_size = 10_000
+
+    def __init__(self, path: Path):
+        from .columnar import book_record, book_schema, import_pyarrow
+
+        super().__init__(path)
+        self._pa = import_pyarrow()
+        self._schema = book_schema()
+        self._record = book_record
+        self._rows: List[Dict[str, Any]] = []
+        self._writer = self._pa.parquet.ParquetWriter(str(path), self._schema, compression="zstd")
+
+    def write(self, book: Book):
+        self._rows.append(self._record(book))
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_batch(self._pa.RecordBatch.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self) -> Path:
+        try:
+            self._flush()
+        finally:
+            self._writer.close()
+        return self.path
+
+
+SINKS = {
+    sink.name: sink
+    for sink in (
+        JsonSink, GoodreadsCsvSink, GoodreadsDeltaSink, MasterCsvSink, RecommendationsSink,
+        IndexSink, LlmSink, ParquetSink,
+    )
+}
+
+EXPORT_FORMATS = ("json", "goodreads", "goodreads-delta", "master", "recommendations", "index", "llm", "parquet")
+# Formats written when none are requested; parquet needs an optional dependency
+DEFAULT_FORMATS = ("json", "goodreads", "master", "recommendations", "index")
+
 
 class Exporter:
-    def __init__(self, output_dir: str = "outputs"):
+    def __init__(
+        self,
+        output_dir: str = "outputs",
+        llm_token_budget: int = DEFAULT_TOKEN_BUDGET,
+        llm_description_words: Optional[int] = None,
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.llm_token_budget = llm_token_budget
+        self.llm_description_words = llm_description_words
+        # Content hash of each book of the export in progress
+        self._digests: Dict[str, str] = {}
+
+    def _open_sink(self, fmt: str, filename: Optional[str] = None, manifest: Optional[OutputManifest] = None) -> Sink:
+        if fmt == "json":
+            return JsonSink(self.output_dir / (filename or "fable_library.json"))
+        if fmt == "goodreads":
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            return GoodreadsCsvSink(self.output_dir / (filename or f"goodreads_import_{timestamp}.csv"))
+        if fmt == "goodreads-delta":
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            previous = (manifest or OutputManifest(self.output_dir)).goodreads_rows
+            return GoodreadsDeltaSink(self.output_dir / (filename or f"goodreads_changes_{timestamp}.csv"), previous)
+        if fmt == "master":
+            return MasterCsvSink(self.output_dir / (filename or "fable_master_list.csv"))
+        if fmt == "recommendations":
+            return RecommendationsSink(self.output_dir / (filename or "recommendations.jsonl"))
+        if fmt == "index":
+            return IndexSink(self.output_dir / (filename or DEFAULT_INDEX_FILENAME), self._digests)
+        if fmt == "llm":
+            return LlmSink(
+                self.output_dir / (filename or "llm"), self.llm_token_budget, self.llm_description_words
+            )
+        if fmt == "parquet":
+            return ParquetSink(self.output_dir / (filename or "fable_library.parquet"))
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of {', '.join(EXPORT_FORMATS)})")
+
+    def open_sinks(self, formats: Sequence[str] = DEFAULT_FORMATS, manifest: Optional[OutputManifest] = None) -> List[Sink]:
+        sinks = []
+        try:
+            for fmt in formats:
+                sinks.append(self._open_sink(fmt, manifest=manifest))
+        except Exception:
+            for sink in sinks:
+                sink.close()
+            raise
+        return sinks
+
+    @staticmethod
+    def close_sinks(sinks: List[Sink], complete: bool = True) -> Dict[str, Path]:
+        """Close every sink; returns the written paths by label (sinks that wrote nothing are left out)."""
+        paths = {sink.label: sink.close() if complete else sink.abort() for sink in sinks}
+        return {label: path for label, path in paths.items() if path is not None}
+
+    def _settings(self, fmt: str) -> Dict[str, Any]:
+        """Options besides the books that change a format's output."""
+        if fmt == "llm":
+            return {"token_budget": self.llm_token_budget, "description_words": self.llm_description_words}
+        return {}
 
-    def to_json(self, books: List[Book], filename: str = "fable_library.json"):
-        path = self.output_dir / filename
-        data = [book.dict() for book in books]
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, default=str)
-        return path
+    def _open_for_rewrite(self, formats: Sequence[str], manifest: OutputManifest) -> List[Sink]:
+        """
+        Open the sinks of `formats`, first dropping their manifest entries: a
+        sink that fails partway can leave a truncated or half-updated file,
+        which must not pass for the last complete export.
+        """
+        if manifest.forget(formats):
+            manifest.save()
+        return self.open_sinks(formats, manifest)
+
+    def _finish(self, sinks: List[Sink], manifest: OutputManifest, library: str) -> Dict[str, Path]:
+        paths = {}
+        for sink in sinks:
+            path = sink.close()
+            if isinstance(sink, GoodreadsCsvSink):
+                manifest.goodreads_rows = sink.row_hashes
+            if path is not None:
+                paths[sink.name] = path
+                if not isinstance(sink, GoodreadsDeltaSink):
+                    manifest.record(sink.name, format_fingerprint(library, sink.name, self._settings(sink.name)), path)
+        if sinks:
+            manifest.save()
+        return paths
+
+    def export(
+        self,
+        books: Iterable[Book],
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        on_book: Optional[Callable[[Book], None]] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> Dict[str, Path]:
+        """
+        Write every requested format in a single pass over `books`. Returns the
+        written paths keyed by a human-readable label.
+
+        When `books` is a sequence (a list, a `CompactLibrary`), a format whose
+        last export (see `manifest`) was written from exactly the same books
+        and settings is left as it is, and its existing file is returned.
+        Any other iterable is streamed through once, without being held in
+        memory, so every format is written; the manifest is still updated.
+        """
+        manifest = OutputManifest(self.output_dir)
+        digests = self._digests = {}
+        library = None
+        unchanged = {}
+        if isinstance(books, abc.Sequence):
+            digests.update((b.id, book_digest(b)) for b in books)
+            library = library_fingerprint((b.id, digests[b.id]) for b in books)
+            for fmt in formats:
+                if fmt != GoodreadsDeltaSink.name:
+                    path = manifest.unchanged(fmt, format_fingerprint(library, fmt, self._settings(fmt)))
+                    if path is not None:
+                        unchanged[fmt] = path
+
+        sinks = self._open_for_rewrite([fmt for fmt in formats if fmt not in unchanged], manifest)
+        try:
+            for book in books:
+                if library is None:
+                    digests[book.id] = book_digest(book)
+                self._write(sinks, book, metrics)
+                if on_book:
+                    on_book(book)
+        except BaseException:
+            self.close_sinks(sinks, complete=False)
+            raise
+        written = self._finish(sinks, manifest, library or library_fingerprint(digests.items()))
+        return {SINKS[fmt].label: {**unchanged, **written}[fmt] for fmt in formats if fmt in unchanged or fmt in written}
+
+    async def aexport(
+        self,
+        books: AsyncIterable[Book],
+        formats: Sequence[str] = DEFAULT_FORMATS,
+        on_book: Optional[Callable[[Book], None]] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> Dict[str, Path]:
+        """
+        Like `export`, but consumes an async iterable as books become
+        available. Every format is written, since the library isn't known
+        up front; the manifest is still updated for the next `export`.
+        """
+        manifest = OutputManifest(self.output_dir)
+        digests = self._digests = {}
+        sinks = self._open_for_rewrite(formats, manifest)
+        try:
+            async for book in books:
+                digests[book.id] = book_digest(book)
+                self._write(sinks, book, metrics)
+                if on_book:
+                    on_book(book)
+        except BaseException:
+            self.close_sinks(sinks, complete=False)
+            raise
+        written = self._finish(sinks, manifest, library_fingerprint(digests.items()))
+        return {SINKS[fmt].label: written[fmt] for fmt in formats if fmt in written}
+
+    @staticmethod
+    def _write(sinks: List[Sink], book: Book, metrics: Optional[Metrics]):
+        if metrics is None:
+            for sink in sinks:
+                sink.write(book)
+            return
+        for sink in sinks:
+            start = time.perf_counter()
+            sink.write(book)
+            metrics.add_time(f"export:{sink.name}", time.perf_counter() - start)
+
+    def _export_one(self, fmt: str, books: Iterable[Book], filename: Optional[str] = None) -> Optional[Path]:
+        if filename is None:
+            return self.export(books, [fmt]).get(SINKS[fmt].label)
+        sink = self._open_sink(fmt, filename)
+        try:
+            for book in books:
+                sink.write(book)
+        except BaseException:
+            sink.abort()
+            raise
+        return sink.close()
+
+    def to_json(self, books: List[Book], filename: Optional[str] = None):
+        return self._export_one("json", books, filename)
 
     def to_goodreads_csv(self, books: List[Book]):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        path = self.output_dir / f"goodreads_import_{timestamp}.csv"
-        
-        headers = [
-            "Title", "Author", "ISBN", "My Rating", "Average Rating", 
-            "Publisher", "Binding", "Year Published", "Original Publication Year", 
-            "Date Read", "Date Added", "Shelves", "Bookshelves", "My Review"
-        ]
-        
-        rows = []
-        for b in books:
-            # Validate ISBN
-            isbn = b.isbn or b.isbn13 or b.isbn10 or ""
-            if isbn:
-                clean_isbn = isbn.replace("-", "").replace(" ", "")
-                if not all(c.isdigit() or c.lower() == 'x' for c in clean_isbn):
-                    isbn = ""
-
-            status = b.status.lower()
-            if status in ["finished", "read"]:
-                shelf = "read"
-                date_read = b.finished_at[:10] if b.finished_at else ""
-            elif status in ["reading", "current"]:
-                shelf = "currently-reading"
-                date_read = ""
-            else:
-                shelf = "to-read"
-                date_read = ""
-
-            rows.append({
-                "Title": b.title,
-                "Author": ", ".join(a.name for a in b.authors),
-                "ISBN": isbn,
-                "My Rating": b.my_rating or "",
-                "Average Rating": b.community_ratings.average or "",
-                "Publisher": b.publisher,
-                "Binding": "Paperback",
-                "Year Published": b.published_date[:4] if b.published_date else "",
-                "Original Publication Year": b.published_date[:4] if b.published_date else "",
-                "Date Read": date_read,
-                "Date Added": b.date_added[:10] if b.date_added else "",
-                "Shelves": shelf,
-                "Bookshelves": " ".join([g.lower().replace(" ", "-") for g in b.genres]),
-                "My Review": b.my_review
-            })
-
-        with open(path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(rows)
-        return path
+        return self._export_one("goodreads", books)
+
+    def to_goodreads_delta_csv(self, books: List[Book]):
+        """Only the books added or changed since the last Goodreads export; None if there are none."""
+        return self._export_one("goodreads-delta", books)
 
     def to_master_csv(self, books: List[Book]):
-        path = self.output_dir / "fable_master_list.csv"
-        if not books: return path
-
-        headers = [
-            "Title", "Authors",
-            "Non Fiction", "Genres", "Subjects", "Moods", "Content Warnings", "Tropes",
-            "Series Name", "Series Position",
-            "Status", "Favorite", "Finished At",
-            "My Rating (Overall)", "My Rating (Characters)",
-            "My Rating (Plot)", "My Rating (Writing)", "My Rating (Setting)",
-            "My Review", "Description",
-        ]
-
-        rows = []
-        for b in books:
-            rows.append({
-                "Title": b.title,
-                "Authors": "; ".join(a.name for a in b.authors),
-                "Non Fiction": b.non_fiction if b.non_fiction is not None else "",
-                "Genres": "; ".join(b.genres),
-                "Subjects": "; ".join(b.subjects),
-                "Moods": "; ".join(b.moods),
-                "Content Warnings": "; ".join(b.content_warnings),
-                "Tropes": "; ".join(b.tropes),
-                "Series Name": b.series.name if b.series else "",
-                "Series Position": b.series.position if b.series else "",
-                "Status": b.list_name or "",
-                "Favorite": b.favorite if b.favorite is not None else "",
-                "Finished At": b.finished_at[:10] if b.finished_at else "",
-                "My Rating (Overall)": b.community_ratings.average if b.community_ratings.average is not None else "",
-                "My Rating (Characters)": b.community_ratings.characters if b.community_ratings.characters is not None else "",
-                "My Rating (Plot)": b.community_ratings.plot if b.community_ratings.plot is not None else "",
-                "My Rating (Writing)": b.community_ratings.writing if b.community_ratings.writing is not None else "",
-                "My Rating (Setting)": b.community_ratings.setting if b.community_ratings.setting is not None else "",
-                "My Review": b.my_review or "",
-                "Description": b.description or "",
-            })
-
-        with open(path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(rows)
-        return path
+        return self._export_one("master", books)
 
     def to_recommendations_jsonl(self, books: List[Book]):
-        path = self.output_dir / "recommendations.jsonl"
-        with open(path, "w", encoding="utf-8") as f:
-            for b in books:
-                record = {
-                    "title": b.title,
-                    "authors": [a.name for a in b.authors],
-                    "status": b.list_name or b.status,
-                    "rating": b.community_ratings.average,
-                    "favorite": b.favorite,
-                    "finished_at": b.finished_at[:10] if b.finished_at else None,
-                    "non_fiction": b.non_fiction,
-                    "genres": b.genres or None,
-                    "moods": b.moods or None,
-                    "tropes": b.tropes or None,
-                    "content_warnings": b.content_warnings or None,
-                    "series": {"name": b.series.name, "position": b.series.position} if b.series else None,
-                    "review": b.my_review or None,
-                    "description": b.description or None,
-                }
-                # Drop null/empty values to save tokens
-                record = {k: v for k, v in record.items() if v is not None and v != [] and v != ""}
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
-        return path
+        return self._export_one("recommendations", books)
+
+    def to_llm_shards(self, books: List[Book]):
+        return self._export_one("llm", books)
+
+    def to_parquet(self, books: List[Book]):
+        return self._export_one("parquet", books)
@@ -0,0 +1,107 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+DEFAULT_CACHE_PATH = "fable_http_cache.db"
+DEFAULT_CACHE_MAX_BYTES = 256 * 2**20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+class CacheEntry(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    body: bytes
+
+    def validators(self) -> Dict[str, str]:
+        """Headers that make the next request for this URL conditional."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    On-disk cache of GET response bodies keyed by URL, revalidated with
+    ETag / Last-Modified so unchanged pages come back as bodiless 304s.
+
+    Only responses that carry a validator are stored. Once the bodies add up
+    to more than `max_bytes`, the least recently used entries are evicted.
+    Writes are committed on `close()`.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+        self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_type, body FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def touch(self, url: str):
+        """Mark a cached entry as just used (after a 304)."""
+        self.hits += 1
+        self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str],
+              content_type: Optional[str], body: bytes):
+        self.misses += 1
+        if not etag and not last_modified:
+            self.discard(url)
+            return
+        if len(body) > self.max_bytes:
+            return
+        self.discard(url)
+        self.conn.execute(
+            "INSERT INTO responses (url, etag, last_modified, content_type, body, size, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, content_type, body, len(body), time.time()),
+        )
+        self.size += len(body)
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def discard(self, url: str):
+        row = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.size -= row[0]
+
+    def _evict(self):
+        rows = self.conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall()
+        evicted = []
+        for url, size in rows:
+            if self.size <= self.max_bytes:
+                break
+            evicted.append((url,))
+            self.size -= size
+        self.conn.executemany("DELETE FROM responses WHERE url = ?", evicted)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,231 @@
+"""
+SQLite index of an exported library, answering filter and full-text queries
+without reloading the JSON export.
+
+Books are stored one row each with their sortable fields, list-like fields
+(tropes, moods, genres, subjects, authors, lists, content warnings) as rows of
+a `facets` table, and titles, authors, series, descriptions and reviews in an
+FTS5 table. Each book's content hash is kept so re-exports only rewrite the
+books that changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+
+if TYPE_CHECKING:
+    from .models import Book
+
+DEFAULT_INDEX_FILENAME = "fable_library.index.db"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    hash TEXT NOT NULL,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    series TEXT,
+    status TEXT,
+    list_name TEXT,
+    favorite INTEGER,
+    rating REAL,
+    finished_at TEXT,
+    date_added TEXT
+);
+CREATE TABLE IF NOT EXISTS facets (
+    book_rowid INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS facets_lookup ON facets (kind, norm, book_rowid);
+CREATE INDEX IF NOT EXISTS facets_book ON facets (book_rowid);
+CREATE INDEX IF NOT EXISTS books_rating ON books (rating);
+CREATE INDEX IF NOT EXISTS books_finished ON books (finished_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title, authors, series, description, review, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+FACET_KINDS = ("trope", "mood", "genre", "subject", "author", "list", "warning")
+
+_TERM_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def normalize(value: str) -> str:
+    """Facet values match case-insensitively, with dashes and underscores read as spaces."""
+    return " ".join(value.replace("-", " ").replace("_", " ").lower().split())
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Quote each word of free text for FTS5 (all words must match; `word*` is a prefix search)."""
+    terms = []
+    for term in _TERM_RE.findall(text):
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms) or None
+
+
+def book_facets(book: Book) -> Dict[str, List[str]]:
+    return {
+        "trope": book.tropes,
+        "mood": book.moods,
+        "genre": book.genres,
+        "subject": book.subjects,
+        "author": [a.name for a in book.authors],
+        "list": [m.name for m in book.lists] or ([book.list_name] if book.list_name else []),
+        "warning": book.content_warnings,
+    }
+
+
+class LibraryIndex:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS books; DROP TABLE IF EXISTS facets; DROP TABLE IF EXISTS books_fts;"
+            )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # Writing
+
+    def hashes(self) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT id, hash FROM books"))
+
+    def upsert(self, book: Book, digest: str):
+        self._delete(book.id)
+        series = book.series.name if book.series else None
+        authors = ", ".join(a.name for a in book.authors)
+        cur = self.conn.execute(
+            "INSERT INTO books (id, hash, title, authors, series, status, list_name, favorite, rating, "
+            "finished_at, date_added) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                book.id, digest, book.title, authors, series, book.status, book.list_name,
+                None if book.favorite is None else int(book.favorite), book.my_rating,
+                book.finished_at or None, book.date_added or None,
+            ),
+        )
+        rowid = cur.lastrowid
+        self.conn.executemany(
+            "INSERT INTO facets (book_rowid, kind, value, norm) VALUES (?, ?, ?, ?)",
+            [
+                (rowid, kind, value, normalize(value))
+                for kind, values in book_facets(book).items()
+                for value in dict.fromkeys(values)
+                if value
+            ],
+        )
+        self.conn.execute(
+            "INSERT INTO books_fts (rowid, title, authors, series, description, review) VALUES (?, ?, ?, ?, ?, ?)",
+            (rowid, book.title, authors, series or "", book.description or "", book.my_review or ""),
+        )
+
+    def _delete(self, book_id: str):
+        row = self.conn.execute("SELECT rowid FROM books WHERE id = ?", (book_id,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM facets WHERE book_rowid = ?", row)
+        self.conn.execute("DELETE FROM books_fts WHERE rowid = ?", row)
+        self.conn.execute("DELETE FROM books WHERE rowid = ?", row)
+
+    def remove_missing(self, keep: Set[str]) -> int:
+        stale = [book_id for (book_id,) in self.conn.execute("SELECT id FROM books") if book_id not in keep]
+        for book_id in stale:
+            self._delete(book_id)
+        return len(stale)
+
+    def commit(self):
+        self.conn.commit()
+
+    # Querying
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        facets: Optional[Dict[str, Iterable[str]]] = None,
+        status: Optional[str] = None,
+        favorite: Optional[bool] = None,
+        min_rating: Optional[float] = None,
+        max_rating: Optional[float] = None,
+        finished_after: Optional[str] = None,
+        finished_before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Books matching every given filter. Facet values within a kind must all
+        match (e.g. two tropes means books with both). Dates are ISO prefixes
+        compared as strings, so `finished_before="2025"` covers all of 2024.
+        Results are ordered by full-text relevance when `text` is given,
+        otherwise by title.
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        join = ""
+        order = "b.title COLLATE NOCASE"
+
+        match = fts_query(text) if text else None
+        if match:
+            join = "JOIN books_fts f ON f.rowid = b.rowid"
+            where.append("books_fts MATCH ?")
+            params.append(match)
+            order = "bm25(books_fts)"
+        for kind, values in (facets or {}).items():
+            for value in values:
+                where.append("b.rowid IN (SELECT book_rowid FROM facets WHERE kind = ? AND norm = ?)")
+                params.extend([kind, normalize(value)])
+        if status is not None:
+            where.append("(lower(b.status) = ? OR lower(b.list_name) = ?)")
+            params.extend([status.lower(), status.lower()])
+        if favorite is not None:
+            where.append("b.favorite = ?")
+            params.append(int(favorite))
+        if min_rating is not None:
+            where.append("b.rating >= ?")
+            params.append(min_rating)
+        if max_rating is not None:
+            where.append("b.rating <= ?")
+            params.append(max_rating)
+        if finished_after is not None:
+            where.append("b.finished_at >= ?")
+            params.append(finished_after)
+        if finished_before is not None:
+            where.append("b.finished_at < ?")
+            params.append(finished_before)
+
+        sql = (
+            "SELECT b.id, b.title, b.authors, b.series, b.status, b.list_name, b.favorite, b.rating, b.finished_at "
+            f"FROM books b {join}"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + f" ORDER BY {order}"
+            + (" LIMIT ?" if limit else "")
+        )
+        if limit:
+            params.append(limit)
+        columns = ("id", "title", "authors", "series", "status", "list_name", "favorite", "rating", "finished_at")
+        rows = []
+        for row in self.conn.execute(sql, params):
+            record = dict(zip(columns, row))
+            record["favorite"] = None if record["favorite"] is None else bool(record["favorite"])
+            rows.append(record)
+        return rows
+
+
+def book_digest(book: Book) -> str:
+    """Content hash of a book. `library.BookRow` views keep theirs precomputed."""
+    cached = getattr(book, "digest", None)
+    if cached is not None:
+        return cached
+    return hashlib.sha1(book.model_dump_json().encode("utf-8")).hexdigest()
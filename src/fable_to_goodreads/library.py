@@ -0,0 +1,352 @@
+"""
+Compact in-memory library.
+
+Holds parsed books as columns instead of one pydantic `Book` (with nested
+models and lists) per book:
+
+- repeated strings (genres, moods, tropes, publishers, statuses, list names)
+  are stored once and referenced by id from `array` columns
+- authors, series, list memberships and reading progress are shared tuples
+- ratings, page counts and flags live in typed `array` columns
+
+`BookRow` views expose the same attributes as `Book`, so the exporters read
+them directly, and `BookRow.to_book()` builds a real `Book` when one is
+needed.
+"""
+import math
+from array import array
+from collections import namedtuple
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .index import book_digest
+from .models import Author, Book, CommunityRatings, ListMembership, ReadingProgress, SeriesInfo
+
+# Free text and per-book values, kept as they are
+TEXT_FIELDS = (
+    "id", "title", "subtitle", "isbn", "isbn10", "isbn13", "display_isbn", "published_date",
+    "description", "cover_image", "cover_image_small", "cover_image_path", "fable_url",
+    "my_review", "started_at", "finished_at", "date_added",
+)
+# Strings with few distinct values across a library, interned
+CATEGORY_FIELDS = (
+    "publisher", "background_color", "source", "price_usd", "store_availability",
+    "list_name", "status", "started_at_date_type", "finished_at_date_type",
+)
+INT_FIELDS = ("page_count", "chapter_count", "family_id", "sort_value")
+FLOAT_FIELDS = ("my_rating",)
+BOOL_FIELDS = ("non_fiction", "is_free", "can_purchase", "can_download", "is_out_of_catalog", "favorite")
+# Lists of interned strings
+TAG_FIELDS = ("genres", "subjects", "moods", "content_warnings", "tropes")
+
+_NO_INT = -(2 ** 63)
+
+# Immutable stand-ins for the nested models, with the same field names and order
+AuthorView = namedtuple("AuthorView", list(Author.model_fields))
+SeriesView = namedtuple("SeriesView", list(SeriesInfo.model_fields))
+MembershipView = namedtuple("MembershipView", list(ListMembership.model_fields))
+ProgressView = namedtuple("ProgressView", list(ReadingProgress.model_fields))
+RatingsView = namedtuple("RatingsView", list(CommunityRatings.model_fields))
+
+
+def _view(cls, model: Any):
+    return cls(*(getattr(model, name) for name in cls._fields))
+
+
+class _Interned:
+    """Distinct values, each stored once and referred to by id; id 0 is None."""
+
+    def __init__(self):
+        self.values: List[Any] = [None]
+        self._ids: Dict[Any, int] = {None: 0}
+
+    def id(self, value: Any) -> int:
+        ident = self._ids.get(value)
+        if ident is None:
+            ident = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return ident
+
+    def intern(self, value: Any) -> Any:
+        return self.values[self.id(value)]
+
+
+class _Ragged:
+    """One list of ids per row, packed into two arrays."""
+
+    def __init__(self):
+        self.values = array("I")
+        self.offsets = array("I", [0])
+
+    def append(self, ids: Iterable[int]):
+        self.values.extend(ids)
+        self.offsets.append(len(self.values))
+
+    def row(self, i: int) -> array:
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+
+class CompactLibrary(Sequence):
+    """
+    Books in crawl order, as `BookRow` views. Add books with `add` (the
+    `Book` can be dropped afterwards); rows can be reordered with `reorder`
+    without moving any data.
+    """
+
+    def __init__(self):
+        self._size = 0
+        self._order: Optional[array] = None
+        self._strings = _Interned()
+        self._authors = _Interned()
+        self._series = _Interned()
+        self._memberships = _Interned()
+        self._progress = _Interned()
+        self._text: Dict[str, List[Any]] = {f: [] for f in TEXT_FIELDS}
+        self._category = {f: array("I") for f in CATEGORY_FIELDS}
+        self._ints = {f: array("q") for f in INT_FIELDS}
+        self._floats = {f: array("d") for f in FLOAT_FIELDS}
+        self._bools = {f: array("b") for f in BOOL_FIELDS}
+        self._tags = {f: _Ragged() for f in TAG_FIELDS}
+        self._author_ids = _Ragged()
+        self._series_ids = array("I")
+        self._progress_ids = array("I")
+        self._ratings = {f: array("d") for f in RatingsView._fields}
+        self._lists: List[Tuple[MembershipView, ...]] = []
+        # `index.book_digest` of each row, cleared when the row is modified
+        self._digests: List[Optional[str]] = []
+
+    def extend(self, books: Iterable[Book]):
+        for book in books:
+            self.add(book)
+
+    def add(self, book: Book) -> int:
+        """Store `book` and return its row number."""
+        for f in TEXT_FIELDS:
+            self._text[f].append(getattr(book, f))
+        for f in CATEGORY_FIELDS:
+            self._category[f].append(self._strings.id(getattr(book, f)))
+        for f in INT_FIELDS:
+            self._ints[f].append(_pack_int(getattr(book, f)))
+        for f in FLOAT_FIELDS:
+            self._floats[f].append(_pack_float(getattr(book, f)))
+        for f in BOOL_FIELDS:
+            self._bools[f].append(_pack_bool(getattr(book, f)))
+        for f in TAG_FIELDS:
+            self._tags[f].append(self._strings.id(v) for v in getattr(book, f))
+        self._author_ids.append(self._authors.id(_view(AuthorView, a)) for a in book.authors)
+        self._series_ids.append(self._series.id(_view(SeriesView, book.series)) if book.series else 0)
+        progress = book.reading_progress
+        self._progress_ids.append(self._progress.id(_view(ProgressView, progress)) if progress else 0)
+        for f, column in self._ratings.items():
+            column.append(_pack_float(getattr(book.community_ratings, f)))
+        self._lists.append(tuple(self._memberships.intern(_view(MembershipView, m)) for m in book.lists))
+        self._digests.append(book_digest(book))
+        self._size += 1
+        if self._order is not None:
+            self._order.append(self._size - 1)
+        return self._size - 1
+
+    def reorder(self, rows: Iterable[int]):
+        """Present the rows in the given order (row numbers as returned by `add`)."""
+        self._order = array("I", rows)
+
+    def set_memberships(self, row: int, memberships: List[Dict[str, Any]]):
+        """Put a book on all the lists in `memberships`, taking its list_name, favorite and sort_value from the first."""
+        views = [_view(MembershipView, ListMembership.model_validate(m)) for m in memberships]
+        self._lists[row] = tuple(self._memberships.intern(v) for v in views)
+        first = views[0]
+        self._category["list_name"][row] = self._strings.id(first.name)
+        self._bools["favorite"][row] = _pack_bool(first.favorite)
+        self._ints["sort_value"][row] = _pack_int(first.sort_value)
+        self._digests[row] = None
+
+    def apply_review(self, row: int, review: Dict[str, Any]):
+        """Fill in the fields of a book parsed without its review (see `parsing.review_fields`)."""
+        from .parsing import review_fields
+
+        book = BookRow(self, row)
+        values = review_fields(review, book.status, book.finished_at, book.date_added)
+        validated = Book.model_validate({**book.model_dump(), **values})
+        values = {name: getattr(validated, name) for name in values}
+        values["community_ratings"] = values["community_ratings"].model_dump()
+        for name in ("finished_at", "my_rating", "my_review", "date_added"):
+            setattr(book, name, values[name])
+        for name, column in self._ratings.items():
+            column[row] = _pack_float(values["community_ratings"][name])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("library index out of range")
+        return BookRow(self, self._order[index] if self._order is not None else index)
+
+    def __iter__(self):
+        rows = self._order if self._order is not None else range(self._size)
+        for row in rows:
+            yield BookRow(self, row)
+
+
+def _pack_int(value: Optional[int]) -> int:
+    return _NO_INT if value is None else int(value)
+
+
+def _pack_float(value: Optional[float]) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _pack_bool(value: Optional[bool]) -> int:
+    return -1 if value is None else int(bool(value))
+
+
+class BookRow:
+    """
+    Read view of one book of a `CompactLibrary`, with the attributes of
+    `Book`. Nested values come back as named tuples and lists as fresh
+    lists. The scalar fields can be assigned, e.g. `row.cover_image_path`.
+    """
+    __slots__ = ("_lib", "_row")
+
+    def __init__(self, library: CompactLibrary, row: int):
+        self._lib = library
+        self._row = row
+
+    @property
+    def authors(self) -> List[AuthorView]:
+        values = self._lib._authors.values
+        return [values[i] for i in self._lib._author_ids.row(self._row)]
+
+    @property
+    def series(self) -> Optional[SeriesView]:
+        return self._lib._series.values[self._lib._series_ids[self._row]]
+
+    @property
+    def reading_progress(self) -> Optional[ProgressView]:
+        return self._lib._progress.values[self._lib._progress_ids[self._row]]
+
+    @property
+    def community_ratings(self) -> RatingsView:
+        return RatingsView(*(_unpack_float(column[self._row]) for column in self._lib._ratings.values()))
+
+    @property
+    def lists(self) -> List[MembershipView]:
+        return list(self._lib._lists[self._row])
+
+    def model_dump(self) -> Dict[str, Any]:
+        """The same dict as `Book.model_dump()`."""
+        return {name: _dump(getattr(self, name)) for name in Book.model_fields}
+
+    def to_book(self) -> Book:
+        from .parsing import construct_book
+
+        return construct_book(self.model_dump())
+
+    def model_dump_json(self) -> str:
+        return self.to_book().model_dump_json()
+
+    @property
+    def digest(self) -> str:
+        """`index.book_digest` of this book, computed when it was added (or last modified)."""
+        digests = self._lib._digests
+        if digests[self._row] is None:
+            digests[self._row] = book_digest(self.to_book())
+        return digests[self._row]
+
+    def __repr__(self) -> str:
+        return f"BookRow(id={self.id!r}, title={self.title!r})"
+
+
+def _unpack_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return value._asdict()
+    if isinstance(value, list):
+        return [_dump(v) for v in value]
+    return value
+
+
+def _column_property(name: str, kind: str) -> property:
+    if kind == "text":
+        def fget(self):
+            return self._lib._text[name][self._row]
+
+        def fset(self, value):
+            self._lib._text[name][self._row] = value
+            self._lib._digests[self._row] = None
+    elif kind == "category":
+        def fget(self):
+            return self._lib._strings.values[self._lib._category[name][self._row]]
+
+        def fset(self, value):
+            self._lib._category[name][self._row] = self._lib._strings.id(value)
+            self._lib._digests[self._row] = None
+    elif kind == "int":
+        def fget(self):
+            value = self._lib._ints[name][self._row]
+            return None if value == _NO_INT else value
+
+        def fset(self, value):
+            self._lib._ints[name][self._row] = _pack_int(value)
+            self._lib._digests[self._row] = None
+    elif kind == "float":
+        def fget(self):
+            return _unpack_float(self._lib._floats[name][self._row])
+
+        def fset(self, value):
+            self._lib._floats[name][self._row] = _pack_float(value)
+            self._lib._digests[self._row] = None
+    elif kind == "bool":
+        def fget(self):
+            value = self._lib._bools[name][self._row]
+            return None if value < 0 else bool(value)
+
+        def fset(self, value):
+            self._lib._bools[name][self._row] = _pack_bool(value)
+            self._lib._digests[self._row] = None
+    else:
+        def fget(self):
+            values = self._lib._strings.values
+            return [values[i] for i in self._lib._tags[name].row(self._row)]
+
+        fset = None
+    return property(fget, fset)
+
+
+for _kind, _fields in (
+    ("text", TEXT_FIELDS), ("category", CATEGORY_FIELDS), ("int", INT_FIELDS),
+    ("float", FLOAT_FIELDS), ("bool", BOOL_FIELDS), ("tags", TAG_FIELDS),
+):
+    for _name in _fields:
+        setattr(BookRow, _name, _column_property(_name, _kind))
+
+_missing = set(Book.model_fields) - {n for n in dir(BookRow) if not n.startswith("_")}
+assert not _missing, f"BookRow has no column for Book fields: {sorted(_missing)}"
+
+
+def parse_library(
+    items: Iterable[Dict[str, Any]], reviews: Dict[str, Any], chunk_size: int = 1000
+) -> CompactLibrary:
+    """
+    `parsing.parse_books` straight into a `CompactLibrary`, a chunk at a time,
+    so at most `chunk_size` `Book` objects exist at once.
+    """
+    from .parsing import parse_books
+
+    library = CompactLibrary()
+    chunk: List[Dict[str, Any]] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            library.extend(parse_books(chunk, reviews))
+            chunk = []
+    if chunk:
+        library.extend(parse_books(chunk, reviews))
+    return library
@@ -0,0 +1,157 @@
+"""
+Token-budgeted export for LLM prompts.
+
+Repeated strings (authors, genres, moods, tropes, content warnings, list
+names) are replaced by ids into a vocabulary, and records are packed into
+shards that each fit a token budget. Every shard starts with the subset of
+the vocabulary its records use, so any shard can be pasted into a prompt on
+its own.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_TOKEN_BUDGET = 100_000
+
+# Record fields whose values are replaced by vocabulary ids
+VOCAB_FIELDS = ("authors", "genres", "moods", "tropes", "content_warnings", "lists")
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local approximation of a BPE tokenizer: one token per word or
+    punctuation mark, plus one for every further 8 characters of a long word.
+    Errs on the high side for English prose and JSON.
+    """
+    pieces = _PIECE_RE.findall(text)
+    return len(pieces) + sum(len(p) // 8 for p in pieces if len(p) > 8)
+
+
+def truncate_words(text: str, words: int) -> str:
+    parts = text.split()
+    if len(parts) <= words:
+        return text
+    return " ".join(parts[:words]) + "…"
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+_EMPTY_HEADER_TOKENS = estimate_tokens(_dumps({"vocab": {}}))
+
+
+class Vocabulary:
+    """Global string ids per field, assigned in first-seen order starting at 1."""
+
+    def __init__(self):
+        self.ids: Dict[str, Dict[str, int]] = {field: {} for field in VOCAB_FIELDS}
+
+    def encode(self, field: str, values: List[str]) -> List[int]:
+        table = self.ids[field]
+        out = []
+        for value in values:
+            ident = table.get(value)
+            if ident is None:
+                ident = table[value] = len(table) + 1
+            out.append(ident)
+        return out
+
+    def to_dict(self) -> Dict[str, Dict[str, str]]:
+        return {field: {str(i): v for v, i in table.items()} for field, table in self.ids.items() if table}
+
+
+class ShardWriter:
+    """
+    Packs compact records into `library_NNN.jsonl` files under `directory`,
+    starting a new shard whenever the next record (plus the vocabulary
+    entries it would add to the shard header) would exceed `token_budget`.
+    A record that is over budget on its own gets a shard to itself.
+    """
+
+    def __init__(self, directory: Path, token_budget: int = DEFAULT_TOKEN_BUDGET, meta: Optional[Dict[str, Any]] = None):
+        self.directory = directory
+        self.token_budget = token_budget
+        self.meta = meta or {}
+        self.vocab = Vocabulary()
+        self.shards: List[Tuple[Path, int]] = []
+        self._lines: List[str] = []
+        self._used: Dict[str, Dict[int, str]] = {}
+        self._tokens = _EMPTY_HEADER_TOKENS
+        directory.mkdir(parents=True, exist_ok=True)
+        for stale in directory.glob("library_*.jsonl"):
+            stale.unlink()
+
+    def _header(self, used: Dict[str, Dict[int, str]]) -> str:
+        return _dumps({"vocab": {f: {str(i): v for i, v in sorted(t.items())} for f, t in used.items() if t}})
+
+    def add(self, record: Dict[str, Any]):
+        refs: Dict[str, Dict[int, str]] = {}
+        for field in VOCAB_FIELDS:
+            values = record.get(field)
+            if values:
+                ids = self.vocab.encode(field, values)
+                record[field] = ids
+                refs[field] = dict(zip(ids, values))
+        line = _dumps(record)
+        tokens = estimate_tokens(line)
+
+        new_entries = self._new_entries(refs)
+        cost = tokens + self._vocab_tokens(new_entries)
+        if self._lines and self._tokens + cost > self.token_budget:
+            self.flush()
+            new_entries = refs
+            cost = tokens + self._vocab_tokens(new_entries)
+
+        for field, entries in new_entries.items():
+            self._used.setdefault(field, {}).update(entries)
+        self._lines.append(line)
+        self._tokens += cost
+
+    def _new_entries(self, refs: Dict[str, Dict[int, str]]) -> Dict[str, Dict[int, str]]:
+        """The vocabulary entries in `refs` that the current shard's header doesn't have yet."""
+        new = {}
+        for field, entries in refs.items():
+            used = self._used.get(field, {})
+            missing = {i: v for i, v in entries.items() if i not in used}
+            if missing:
+                new[field] = missing
+        return new
+
+    @staticmethod
+    def _vocab_tokens(entries: Dict[str, Dict[int, str]]) -> int:
+        # `"12":"Science Fiction",` per entry, plus the field's own key
+        return sum(
+            2 + sum(estimate_tokens(f'"{i}":{_dumps(v)},') for i, v in table.items())
+            for table in entries.values()
+        )
+
+    def flush(self):
+        if not self._lines:
+            return
+        path = self.directory / f"library_{len(self.shards) + 1:03d}.jsonl"
+        header = self._header(self._used)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(header + "\n")
+            for line in self._lines:
+                f.write(line + "\n")
+        self.shards.append((path, self._tokens))
+        self._lines = []
+        self._used = {}
+        self._tokens = _EMPTY_HEADER_TOKENS
+
+    def close(self) -> Path:
+        """Write the last shard and an `index.json` with every shard's size and the full vocabulary."""
+        self.flush()
+        manifest = {
+            "token_budget": self.token_budget,
+            **self.meta,
+            "shards": [{"file": path.name, "estimated_tokens": tokens} for path, tokens in self.shards],
+            "vocab": self.vocab.to_dict(),
+        }
+        with open(self.directory / "index.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return self.directory
@@ -0,0 +1,74 @@
+"""
+Record of the last export in an output directory, used to skip work.
+
+`export_manifest.json` holds, per format, the file it wrote and a
+fingerprint of the library it was written from (every book's content hash,
+in order, plus the format's settings). A format whose fingerprint hasn't
+changed is not written again. It also keeps a hash of each book's Goodreads
+row, so the `goodreads-delta` format can write only the rows that changed.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+MANIFEST_FILENAME = "export_manifest.json"
+
+# Bump whenever an export's layout changes, so outputs written by an older
+# version are rewritten even though the books themselves are unchanged
+LAYOUT_VERSION = 1
+
+
+def library_fingerprint(digests: Iterable[Tuple[str, str]]) -> str:
+    """Hash of a library's (book id, content hash) pairs, in export order."""
+    h = hashlib.sha256()
+    for book_id, digest in digests:
+        h.update(f"{book_id}:{digest}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def format_fingerprint(library: str, fmt: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    data = json.dumps([LAYOUT_VERSION, library, fmt, settings or {}], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class OutputManifest:
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_FILENAME
+        self.formats: Dict[str, Dict[str, str]] = {}
+        self.goodreads_rows: Dict[str, str] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("layout_version") == LAYOUT_VERSION:
+            self.formats = data.get("formats") or {}
+            self.goodreads_rows = data.get("goodreads_rows") or {}
+
+    def unchanged(self, fmt: str, fingerprint: str) -> Optional[Path]:
+        """The file written for `fmt` last time, if it was written from the same data and still exists."""
+        entry = self.formats.get(fmt)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return None
+        path = self.output_dir / entry["file"]
+        return path if path.exists() else None
+
+    def forget(self, formats: Iterable[str]) -> bool:
+        """Drop the entries of formats about to be rewritten; returns whether there were any."""
+        dropped = [fmt for fmt in formats if self.formats.pop(fmt, None) is not None]
+        return bool(dropped)
+
+    def record(self, fmt: str, fingerprint: str, path: Path):
+        self.formats[fmt] = {"fingerprint": fingerprint, "file": Path(path).name}
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"layout_version": LAYOUT_VERSION, "formats": self.formats, "goodreads_rows": self.goodreads_rows},
+                f, indent=2, sort_keys=True,
+            )
+        os.replace(tmp, self.path)
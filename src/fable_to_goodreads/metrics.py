@@ -0,0 +1,131 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+# Upper bounds (ms) of the latency histogram buckets; anything slower lands in "inf"
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def endpoint_name(url: str) -> str:
+    """Collapse ids out of an API URL so requests group by endpoint, e.g. `/v2/users/{user_id}/reviews/`."""
+    parts = urlsplit(url).path.split("/")
+    out = []
+    for i, part in enumerate(parts):
+        prev = parts[i - 1] if i else ""
+        if prev == "users" and part:
+            out.append("{user_id}")
+        elif prev == "book_lists" and part:
+            out.append("{list_id}")
+        else:
+            out.append(part)
+    path = "/".join(out)
+    return path[len("/api"):] if path.startswith("/api/") else path
+
+
+def peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes everywhere else
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.statuses: Dict[int, int] = {}
+        self.latencies_ms: List[float] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        histogram = {f"<={b}ms": 0 for b in LATENCY_BUCKETS_MS}
+        histogram["inf"] = 0
+        for ms in latencies:
+            for b in LATENCY_BUCKETS_MS:
+                if ms <= b:
+                    histogram[f"<={b}ms"] += 1
+                    break
+            else:
+                histogram["inf"] += 1
+
+        def pct(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1)
+
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0), "histogram": histogram},
+        }
+
+
+class Metrics:
+    """
+    Collects per-stage wall times and per-endpoint request statistics for one
+    run. Stages that overlap (e.g. concurrent list crawls) are timed
+    independently, so their durations can add up to more than the run time.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def _endpoint(self, url: str) -> EndpointStats:
+        name = endpoint_name(url)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def record_request(self, url: str, status: int, nbytes: int, seconds: float):
+        stats = self._endpoint(url)
+        stats.requests += 1
+        stats.bytes += nbytes
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.latencies_ms.append(seconds * 1000)
+
+    def record_retry(self, url: str):
+        self._endpoint(url).retries += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        endpoints = {name: stats.to_dict() for name, stats in sorted(self.endpoints.items())}
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(time.perf_counter() - self._t0, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "requests": sum(e["requests"] for e in endpoints.values()),
+            "bytes": sum(e["bytes"] for e in endpoints.values()),
+            "retries": sum(e["retries"] for e in endpoints.values()),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "endpoints": endpoints,
+        }
+
+    def write_json(self, path: str) -> Dict[str, Any]:
+        data = self.to_dict()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return data
@@ -27,6 +27,11 @@ class ReadingProgress(BaseModel):
     page_count: Optional[int] = None
     status: Optional[str] = None
 
+class ListMembership(BaseModel):
+    name: str
+    favorite: Optional[bool] = None
+    sort_value: Optional[int] = None
+
 class Book(BaseModel):
     id: str
     title: str
@@ -43,6 +48,8 @@ class Book(BaseModel):
     description: Optional[str] = ""
     cover_image: Optional[str] = ""
     cover_image_small: Optional[str] = ""
+    # Downloaded cover, relative to the export directory (see `covers`)
+    cover_image_path: Optional[str] = ""
     background_color: Optional[str] = ""
     fable_url: Optional[str] = ""
     source: Optional[str] = ""
@@ -62,7 +69,10 @@ class Book(BaseModel):
     series: Optional[SeriesInfo] = None
 
     # User specific data
+    # list_name, favorite and sort_value come from the first list the book was found on;
+    # `lists` holds every list it is on
     list_name: Optional[str] = ""
+    lists: List[ListMembership] = []
     status: str = "unread"
     my_rating: Optional[float] = None
     my_review: Optional[str] = ""
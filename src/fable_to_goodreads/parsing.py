@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+    from .models import Book
+
+# pydantic and the models are imported on first parse rather than at module
+# import, so that `fable-export --help` and the CLI's argument parsing stay cheap
+
+_books_adapter: Optional[TypeAdapter] = None
+
+
+def _get_books_adapter() -> TypeAdapter:
+    # Building the validator is relatively expensive, so compile it once on first use
+    global _books_adapter
+    if _books_adapter is None:
+        from pydantic import TypeAdapter
+        from .models import Book
+        _books_adapter = TypeAdapter(List[Book])
+    return _books_adapter
+
+
+def item_book_id(item: Dict[str, Any]) -> Optional[str]:
+    """Book id of a raw list item (or bare book payload), if it has one."""
+    raw_book = item.get("book", item) if isinstance(item, dict) else None
+    return raw_book.get("id") if isinstance(raw_book, dict) else None
+
+
+def list_membership(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The list membership recorded on a raw list item tagged with `_list_name`, if any."""
+    name = item.get("_list_name") if isinstance(item, dict) else None
+    if not name:
+        return None
+    return {"name": name, "favorite": item.get("favorite"), "sort_value": item.get("sort_value")}
+
+
+def merge_list_items(items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse raw list items to one per book id, in first-seen order, so each
+    book is parsed once. The first occurrence is kept and carries the
+    memberships of every occurrence in `_lists`.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        book_id = item_book_id(item)
+        if not book_id:
+            continue
+        membership = list_membership(item)
+        first = merged.get(book_id)
+        if first is None:
+            first = merged[book_id] = dict(item)
+            first["_lists"] = []
+        if membership is not None:
+            first["_lists"].append(membership)
+    return list(merged.values())
+
+
+def index_reviews(data: Dict[str, Any], reviews: Dict[str, Dict[str, Any]]):
+    """Add the reviews of one raw reviews page to `reviews`, keyed by book id."""
+    for r in data.get("results", []):
+        if isinstance(r, dict):
+            book_data = r.get("book", {})
+            if isinstance(book_data, dict):
+                book_id = book_data.get("id")
+                if book_id:
+                    reviews[book_id] = r
+
+
+def review_fields(review: Dict[str, Any], status: str, finished_at: str, created_at: str) -> Dict[str, Any]:
+    """
+    The fields of a normalised book that come from the user's review, given
+    the book's status, its own finish date and its own creation date.
+    """
+    if not finished_at and status.lower() in ["finished", "read"]:
+        finished_at = review.get("created_at") or review.get("updated_at") or ""
+    return {
+        "finished_at": finished_at,
+        "my_rating": review.get("rating"),
+        "my_review": review.get("review") or "",
+        "date_added": review.get("created_at") or created_at or "",
+        # These are the user's own sub-ratings from the reviews endpoint
+        "community_ratings": {
+            "average": review.get("rating"),
+            "characters": review.get("characters_rating"),
+            "plot": review.get("plot_rating"),
+            "writing": review.get("writing_style_rating"),
+            "setting": review.get("setting_rating"),
+        },
+    }
+
+
+def normalize_book(item: Dict[str, Any], reviews: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Turn one raw list item (joined with its review) into a plain dict with the
+    shape of `Book`, or None if the item has no usable book.
+    """
+    if not item or not isinstance(item, dict):
+        return None
+
+    raw_book = item.get("book", item)
+    if not raw_book or not isinstance(raw_book, dict):
+        return None
+
+    book_id = raw_book.get("id")
+    if not book_id:
+        return None
+
+    review = reviews.get(book_id, {})
+    if not isinstance(review, dict):
+        review = {}
+
+    # Series
+    series_sets = raw_book.get("bookseries_set", [])
+    series = None
+    if series_sets and isinstance(series_sets, list):
+        s = series_sets[0]
+        if isinstance(s, dict):
+            series_obj = s.get("book_series", {})
+            series = {
+                "name": series_obj.get("name", "") if isinstance(series_obj, dict) else "",
+                "position": str(s.get("position", "")),
+            }
+
+    # ISBN
+    isbn = raw_book.get("isbn", "") or ""
+    isbn10 = isbn if len(isbn) == 10 else ""
+    isbn13 = isbn if len(isbn) == 13 else ""
+
+    # Status — authoritative source is reading_progress.status
+    reading_progress_raw = raw_book.get("reading_progress") or {}
+    if not isinstance(reading_progress_raw, dict):
+        reading_progress_raw = {}
+    status = reading_progress_raw.get("status") or item.get("status") or raw_book.get("status") or "unread"
+
+    reading_progress = {
+        "current_percentage": reading_progress_raw.get("current_percentage"),
+        "current_page": reading_progress_raw.get("current_page"),
+        "page_count": reading_progress_raw.get("page_count"),
+        "status": reading_progress_raw.get("status"),
+    } if reading_progress_raw else None
+
+    # Dates, ratings and the review text
+    started_at = raw_book.get("started_reading_at") or ""
+    from_review = review_fields(
+        review, status, raw_book.get("finished_reading_at") or "", raw_book.get("created_at") or ""
+    )
+
+    # Authors
+    raw_authors = raw_book.get("authors", [])
+    authors = []
+    if isinstance(raw_authors, list):
+        for a in raw_authors:
+            if isinstance(a, dict):
+                name = a.get("name")
+                if name:
+                    authors.append({
+                        "name": name,
+                        "slug": a.get("slug"),
+                        "biography": a.get("biography", ""),
+                    })
+            elif isinstance(a, str):
+                authors.append({"name": a, "slug": None, "biography": ""})
+
+    # Tags
+    storygraph_tags = raw_book.get("storygraph_tags") or {}
+    if not isinstance(storygraph_tags, dict):
+        storygraph_tags = {}
+
+    moods = storygraph_tags.get("moods")
+    if not isinstance(moods, list): moods = []
+
+    cw = storygraph_tags.get("content_warnings")
+    if not isinstance(cw, list): cw = []
+
+    tropes = raw_book.get("tropes")
+    if not isinstance(tropes, list):
+        tropes = []
+
+    # Subjects — list of lists, flatten to "Fiction > Literary" style strings
+    raw_subjects = raw_book.get("subjects") or []
+    subjects = [" > ".join(s) for s in raw_subjects if isinstance(s, list)]
+
+    return {
+        "id": book_id,
+        "title": raw_book.get("title", "Unknown"),
+        "subtitle": raw_book.get("subtitle") or "",
+        "authors": authors,
+        "isbn": isbn,
+        "isbn10": isbn10,
+        "isbn13": isbn13,
+        "display_isbn": raw_book.get("display_isbn") or "",
+        "publisher": raw_book.get("imprint") or raw_book.get("publisher") or "",
+        "page_count": raw_book.get("page_count"),
+        "chapter_count": raw_book.get("chapter_count"),
+        "published_date": raw_book.get("published_date") or "",
+        "description": raw_book.get("description") or "",
+        "cover_image": raw_book.get("cover_image") or "",
+        "cover_image_small": raw_book.get("cover_image_small") or "",
+        "background_color": raw_book.get("background_color") or "",
+        "fable_url": raw_book.get("url") or "",
+        "source": raw_book.get("source") or "",
+        "price_usd": raw_book.get("price_usd") or "",
+        "non_fiction": raw_book.get("non_fiction"),
+        "family_id": raw_book.get("family_id"),
+        "is_free": raw_book.get("is_free"),
+        "can_purchase": raw_book.get("can_purchase"),
+        "can_download": raw_book.get("can_download"),
+        "store_availability": raw_book.get("store_availability") or "",
+        "is_out_of_catalog": raw_book.get("is_out_of_catalog"),
+        "genres": [g.get("name") for g in raw_book.get("genres", []) if isinstance(g, dict) and g.get("name")],
+        "subjects": subjects,
+        "moods": moods,
+        "content_warnings": cw,
+        "tropes": tropes,
+        "series": series,
+        "status": status,
+        "my_rating": from_review["my_rating"],
+        "my_review": from_review["my_review"],
+        "started_at": started_at,
+        "started_at_date_type": raw_book.get("started_reading_date_type") or "",
+        "finished_at": from_review["finished_at"],
+        "finished_at_date_type": raw_book.get("finished_reading_date_type") or "",
+        "date_added": from_review["date_added"],
+        "list_name": item.get("_list_name") or "",
+        "lists": item.get("_lists") or [m for m in (list_membership(item),) if m is not None],
+        "favorite": item.get("favorite"),
+        "sort_value": item.get("sort_value"),
+        "reading_progress": reading_progress,
+        "community_ratings": from_review["community_ratings"],
+    }
+
+
+def construct_book(data: Dict[str, Any]) -> Book:
+    """
+    Build a Book from a normalised dict without validation. Only use it on data
+    that has already been validated, e.g. a book read back from a `CompactLibrary`.
+    """
+    from .models import Author, Book, CommunityRatings, ListMembership, ReadingProgress, SeriesInfo
+
+    data = dict(data)
+    data["authors"] = [Author.model_construct(**a) for a in data["authors"]]
+    data["lists"] = [ListMembership.model_construct(**m) for m in data["lists"]]
+    if data["series"] is not None:
+        data["series"] = SeriesInfo.model_construct(**data["series"])
+    if data["reading_progress"] is not None:
+        data["reading_progress"] = ReadingProgress.model_construct(**data["reading_progress"])
+    data["community_ratings"] = CommunityRatings.model_construct(**data["community_ratings"])
+    return Book.model_construct(**data)
+
+
+def parse_book(item: Dict[str, Any], reviews: Dict[str, Any]) -> Optional[Book]:
+    data = normalize_book(item, reviews)
+    if data is None:
+        return None
+    from .models import Book
+    return Book.model_validate(data)
+
+
+def parse_books(items: Iterable[Dict[str, Any]], reviews: Dict[str, Any]) -> List[Book]:
+    """Parse many raw items at once, skipping unusable ones, validating the whole batch with one compiled TypeAdapter."""
+    normalized = [d for d in (normalize_book(item, reviews) for item in items) if d is not None]
+    return _get_books_adapter().validate_python(normalized)
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .library import CompactLibrary
+from .parsing import index_reviews, item_book_id, list_membership, parse_book
+from .store import content_hash
+
+_STOP = object()
+_REVIEWS_DONE = object()
+
+SortKey = Tuple[int, int]
+
+
+class ParsePipeline:
+    """
+    Streams list pages from the crawlers into `parse_book` through a bounded
+    queue, so parsing overlaps network waits and raw items are dropped as soon
+    as they are parsed. Only the queued pages and the parsed library are held
+    in memory.
+
+    Every item is parsed as soon as it arrives, with the reviews received so
+    far. A book whose review hadn't arrived yet gets its review fields
+    (rating, review text, date added, finish date fallback) filled in once
+    the reviews crawl finishes, with the same result as parsing it then.
+
+    Every item carries a (list index, position) key. A book that appears on
+    several lists is parsed only once, from whichever occurrence arrives
+    first; the others just add a list membership. Once the crawl is done each
+    book takes its list fields from the occurrence with the lowest key and is
+    ordered by it, which matches a serial crawl regardless of the order pages
+    arrive in.
+
+    Parsed books go straight into a `CompactLibrary`, so neither the raw
+    items nor the `Book` models outlive their parse.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 16,
+        track_hashes: bool = False,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.reviews: Dict[str, Dict[str, Any]] = {}
+        self.raw_hashes: Dict[str, str] = {}
+        self.received = 0
+        self.parsed = 0
+        self.parse_seconds = 0.0
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize)
+        self._track_hashes = track_hashes
+        self._on_progress = on_progress
+        self._reviews_complete = False
+        # Book id -> row of books parsed before their review could have arrived
+        self._unreviewed: Dict[str, int] = {}
+        self._library = CompactLibrary()
+        # Book id -> (key it was parsed from, row in the library)
+        self._rows: Dict[str, Tuple[SortKey, int]] = {}
+        self._seen: Dict[str, List[Tuple[SortKey, Optional[Dict[str, Any]]]]] = {}
+
+    def add_review_page(self, page: Dict[str, Any]):
+        index_reviews(page, self.reviews)
+
+    async def finish_reviews(self, reviews: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Mark the reviews crawl as done, optionally replacing the review map."""
+        await self._queue.put((_REVIEWS_DONE, reviews))
+
+    async def put_items(self, list_index: int, start: int, items: List[Dict[str, Any]]):
+        """Queue one page of list items; waits while the queue is full."""
+        self.received += len(items)
+        self._report()
+        await self._queue.put(((list_index, start), items))
+
+    async def close(self):
+        await self._queue.put(_STOP)
+
+    async def run(self) -> CompactLibrary:
+        """Consume queued pages until `close()` and return the parsed books in crawl order."""
+        while True:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                break
+            marker, payload = entry
+            if marker is _REVIEWS_DONE:
+                if payload is not None:
+                    self.reviews = payload
+                self._reviews_complete = True
+                self._apply_reviews()
+                continue
+            list_index, start = marker
+            for i, item in enumerate(payload):
+                key = (list_index, start + i)
+                book_id = item_book_id(item)
+                occurrences = self._seen.get(book_id) if book_id else None
+                if occurrences is not None:
+                    occurrences.append((key, list_membership(item)))
+                    self.parsed += 1
+                    continue
+                if book_id:
+                    self._seen[book_id] = [(key, list_membership(item))]
+                self._parse(key, item)
+            self._report()
+
+        self._apply_reviews()
+        return self._finish()
+
+    def _apply_reviews(self):
+        unreviewed, self._unreviewed = self._unreviewed, {}
+        for book_id, row in unreviewed.items():
+            review = self.reviews.get(book_id)
+            if isinstance(review, dict):
+                self._library.apply_review(row, review)
+
+    def _finish(self) -> CompactLibrary:
+        ordered = []
+        for book_id, (parsed_key, row) in self._rows.items():
+            occurrences = sorted(self._seen.get(book_id, []), key=lambda km: km[0])
+            memberships = [m for _, m in occurrences if m is not None]
+            key = occurrences[0][0] if occurrences else parsed_key
+            if memberships and (len(memberships) > 1 or key != parsed_key):
+                self._library.set_memberships(row, memberships)
+            ordered.append((key, row))
+        ordered.sort(key=lambda kr: kr[0])
+        self._library.reorder(row for _, row in ordered)
+        return self._library
+
+    def _parse(self, key: SortKey, item: Dict[str, Any]):
+        self.parsed += 1
+        start = time.perf_counter()
+        book = parse_book(item, self.reviews)
+        self.parse_seconds += time.perf_counter() - start
+        if not book:
+            return
+        if book.id in self._rows:
+            return
+        row = self._library.add(book)
+        self._rows[book.id] = (key, row)
+        if not self._reviews_complete and book.id not in self.reviews:
+            self._unreviewed[book.id] = row
+        if self._track_hashes:
+            self.raw_hashes[book.id] = content_hash(item.get("book", item))
+
+    def _report(self):
+        if self._on_progress:
+            self._on_progress(self.parsed, self.received)
@@ -0,0 +1,133 @@
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .archive import iter_raw
+from .llm import DEFAULT_TOKEN_BUDGET
+from .parsing import index_reviews
+
+REVIEWS_NAME_RE = re.compile(r"^reviews_(?P<offset>\d+)$")
+LIST_NAME_RE = re.compile(r"^list_(?P<key>.+)_(?P<offset>\d+)$")
+
+
+def _crawled_pages(pages: Dict[int, Any]) -> List[Dict[str, Any]]:
+    """
+    The pages of one paginated listing as the last crawl saw them: walked in
+    offset order from 0 and ending where `FableClient._paginate` ended (an
+    empty or short page, `next: null` or the reported `count`). Pages left
+    behind by an earlier, longer crawl are ignored.
+    """
+    walked = []
+    offset = 0
+    while offset in pages:
+        page = pages[offset]
+        results = page.get("results") or []
+        walked.append(page)
+        offset += len(results)
+        count = page.get("count")
+        if not results or page.get("next", "") is None or (isinstance(count, int) and offset >= count):
+            break
+    return walked
+
+
+def load_raw_dir(raw_dir: str) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read the responses saved by FableClient._save_raw (in any RawArchive
+    format) back into the same shapes the live crawl produces: a review map
+    keyed by book id and the list items (tagged with `_list_name`) in list
+    and page order. Where several runs saved the same page, the newest
+    copy wins.
+    """
+    root = Path(raw_dir)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Raw data directory not found: {root}")
+
+    review_pages: Dict[int, Any] = {}
+    list_pages: Dict[str, Dict[int, Any]] = {}
+    user_lists = None
+    for name, data in iter_raw(raw_dir):
+        if name == "user_lists":
+            user_lists = data
+            continue
+        m = REVIEWS_NAME_RE.match(name)
+        if m:
+            review_pages[int(m.group("offset"))] = data
+            continue
+        m = LIST_NAME_RE.match(name)
+        if m:
+            list_pages.setdefault(m.group("key"), {})[int(m.group("offset"))] = data
+
+    if not review_pages and not list_pages:
+        raise FileNotFoundError(f"No saved reviews or list pages found in {root}")
+
+    reviews: Dict[str, Dict[str, Any]] = {}
+    for page in _crawled_pages(review_pages):
+        index_reviews(page, reviews)
+
+    # List pages are saved by list id (by list name in archives from older
+    # versions). The saved lists response gives their names and the
+    # account's own list order.
+    lists = [lst for lst in (user_lists or {}).get("results", []) if isinstance(lst, dict)]
+    names: Dict[str, str] = {}
+    for lst in lists:
+        name = lst.get("name", "Unknown")
+        for key in (str(lst.get("id")), name):
+            if key in list_pages and key not in names:
+                names[key] = name
+                break
+    list_names = {lst.get("name", "Unknown") for lst in lists}
+    # Pages of lists missing from the lists response, except old name-keyed copies of lists found by id
+    names.update((key, key) for key in sorted(list_pages) if key not in names and key not in list_names)
+
+    items: List[Dict[str, Any]] = []
+    for key, name in names.items():
+        for page in _crawled_pages(list_pages[key]):
+            results = page.get("results", [])
+            for r in results:
+                r["_list_name"] = name
+            items.extend(results)
+
+    return reviews, items
+
+
+def replay_account(
+    raw_dir: str,
+    output_dir: str,
+    formats: Sequence[str],
+    llm_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    llm_description_words: Optional[int] = None,
+    covers_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Rebuild one account's exports from its raw archive, printing nothing.
+
+    This is the unit of work of a bulk replay and runs in a worker process,
+    so it takes and returns only plain, picklable values: whether it
+    succeeded, the error message if not, the number of books, the written
+    paths by label and the run's metrics.
+    """
+    from .covers import CoverStore, attach_cached_covers
+    from .exporter import Exporter
+    from .library import parse_library
+    from .metrics import Metrics
+    from .parsing import merge_list_items
+
+    metrics = Metrics()
+    result: Dict[str, Any] = {"ok": False, "error": None, "books": 0, "paths": {}}
+    try:
+        with metrics.stage("load"):
+            reviews, items = load_raw_dir(raw_dir)
+        with metrics.stage("parse"):
+            books = parse_library(merge_list_items(items), reviews)
+        # Only the compact library is kept while exporting
+        del reviews, items
+        exporter = Exporter(output_dir, llm_token_budget, llm_description_words)
+        if covers_dir:
+            attach_cached_covers(books, CoverStore(covers_dir), exporter.output_dir)
+        with metrics.stage("export"):
+            paths = exporter.export(books, formats, metrics=metrics)
+        result.update(ok=True, books=len(books), paths={label: str(path) for label, path in paths.items()})
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["metrics"] = metrics.to_dict()
+    return result
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class CrawlScheduler:
+    """
+    Runs crawl coroutines concurrently while keeping at most `concurrency`
+    of them in flight at any time.
+    """
+
+    def __init__(self, concurrency: int = 4):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(self, coro: Awaitable[T]) -> T:
+        async with self._semaphore:
+            return await coro
+
+    def spawn(self, coro: Awaitable[T]) -> "asyncio.Task[T]":
+        return asyncio.ensure_future(self.run(coro))
+
+    async def gather(self, coros: Iterable[Awaitable[Any]]) -> List[Any]:
+        """
+        Run every coroutine under the concurrency limit and return their
+        results in submission order. The first failure cancels the rest.
+        """
+        return await gather_or_cancel([self.spawn(c) for c in coros])
+
+
+async def gather_or_cancel(aws: Iterable[Awaitable[Any]]) -> List[Any]:
+    """
+    Like asyncio.gather, but cancels the remaining awaitables as soon as one
+    of them fails instead of leaving them running in the background.
+    """
+    tasks = [asyncio.ensure_future(a) for a in aws]
+    if not tasks:
+        return []
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except asyncio.CancelledError:
+        for t in tasks:
+            t.cancel()
+        raise
+    # Retrieve every failure, not just the one raised, so asyncio doesn't log the others as never retrieved
+    errors = [t.exception() for t in tasks if t in done and not t.cancelled()]
+    error = next((e for e in errors if e is not None), None)
+    if error is not None:
+        for p in pending:
+            p.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise error
+    return [t.result() for t in tasks]
@@ -0,0 +1,75 @@
+import base64
+import binascii
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+SESSION_FILE = Path.home() / ".fable_export_session.json"
+
+# Treat tokens this close to expiry as already expired
+EXPIRY_MARGIN_SECONDS = 300
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """The `exp` claim of a JWT (with or without its "JWT " prefix), if it has one."""
+    raw = token.split(" ", 1)[-1]
+    parts = raw.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (ValueError, binascii.Error):
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+class SessionCache:
+    """
+    Remembers the user id and JWT captured by the browser login, per email,
+    so later runs can skip launching a browser until the token expires or is
+    rejected by the API.
+    """
+
+    def __init__(self, path: Path = SESSION_FILE):
+        self.path = Path(path)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: Dict[str, Any]):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def load(self, email: str) -> Optional[Tuple[str, str]]:
+        entry = self._read().get(email)
+        if not isinstance(entry, dict):
+            return None
+        user_id, token = entry.get("user_id"), entry.get("token")
+        if not user_id or not token:
+            return None
+        exp = token_expiry(token)
+        if exp is not None and exp - EXPIRY_MARGIN_SECONDS <= time.time():
+            return None
+        return user_id, token
+
+    def save(self, email: str, user_id: str, token: str):
+        data = self._read()
+        data[email] = {"user_id": user_id, "token": token, "saved_at": time.time()}
+        self._write(data)
+
+    def clear(self, email: str):
+        data = self._read()
+        if data.pop(email, None) is not None:
+            self._write(data)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+
+from .parsing import item_book_id
+
+if TYPE_CHECKING:
+    from .models import Book
+
+DEFAULT_STORE_PATH = "fable_library.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    raw_hash TEXT NOT NULL,
+    review_updated_at TEXT,
+    synced_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    list_id TEXT NOT NULL,
+    book_id TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    raw TEXT NOT NULL,
+    raw_hash TEXT NOT NULL,
+    position INTEGER,
+    PRIMARY KEY (list_id, book_id)
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    book_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at TEXT
+);
+"""
+
+
+def content_hash(data: Any) -> str:
+    """Stable hash of a raw API payload, ignoring keys we add ourselves (e.g. `_list_name`)."""
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if not k.startswith("_")}
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LibraryStore:
+    """
+    Local SQLite record of the last sync, keyed by Fable book id.
+
+    Used by incremental exports: a list crawl stops at the first page whose
+    items all match what was stored last time, and the rest of the list is
+    filled in from the store. A list page only matches if the list still has the
+    same number of books and each item sits at the offset it was stored at,
+    so books added or removed anywhere before it force a walk of the whole
+    list. An edit behind the stopping page that leaves the count unchanged
+    (one book removed and another added) is only noticed on the next full
+    (non-incremental) sync.
+
+    Reviews are always fetched in full: nothing says the API orders them by
+    `updated_at`, so an edit to an old review could sit behind any page.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+        # Stores written before positions were tracked; their rows never match, so lists are walked in full once
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(memberships)")}
+        if "position" not in columns:
+            self.conn.execute("ALTER TABLE memberships ADD COLUMN position INTEGER")
+
+    def __enter__(self) -> "LibraryStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.commit()
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # Reviews
+
+    def sync_reviews(self, fetched: Dict[str, Dict[str, Any]]):
+        """Replace the stored reviews with the full set just fetched."""
+        self.conn.execute("DELETE FROM reviews")
+        self.conn.executemany(
+            "INSERT INTO reviews (book_id, data, updated_at) VALUES (?, ?, ?)",
+            [(book_id, json.dumps(r), r.get("updated_at")) for book_id, r in fetched.items()],
+        )
+
+    # Lists
+
+    def list_page_unchanged(self, list_id: str, page: Dict[str, Any], offset: int) -> bool:
+        """Whether the page at `offset` holds the same items, at the same positions, of a list of the same size."""
+        results = page.get("results") or []
+        count = page.get("count")
+        if not results or not isinstance(count, int):
+            return False
+        stored = self.conn.execute("SELECT COUNT(*) FROM memberships WHERE list_id = ?", (list_id,)).fetchone()[0]
+        if stored != count:
+            return False
+        for position, item in enumerate(results, offset):
+            if not isinstance(item, dict):
+                return False
+            row = self.conn.execute(
+                "SELECT raw_hash, position FROM memberships WHERE list_id = ? AND book_id = ?",
+                (list_id, item_book_id(item)),
+            ).fetchone()
+            if row is None or row != (content_hash(item), position):
+                return False
+        return True
+
+    def sync_list(
+        self, list_id: str, list_name: str, fetched: List[Dict[str, Any]], complete: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Store freshly fetched list items (the head of the list, in order) and
+        return the stored items that were not re-fetched, i.e. the rest of the
+        list after an incremental stop.
+        """
+        if complete:
+            self.conn.execute("DELETE FROM memberships WHERE list_id = ?", (list_id,))
+        else:
+            # The stop confirmed that the stored rows behind the fetched head are still in place
+            self.conn.execute(
+                "DELETE FROM memberships WHERE list_id = ? AND (position IS NULL OR position < ?)",
+                (list_id, len(fetched)),
+            )
+        rows = []
+        seen = set()
+        for position, item in enumerate(fetched):
+            book_id = item_book_id(item)
+            if not book_id:
+                continue
+            seen.add(book_id)
+            rows.append((list_id, book_id, list_name, json.dumps(item), content_hash(item), position))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO memberships (list_id, book_id, list_name, raw, raw_hash, position) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        items = []
+        for book_id, raw in self.conn.execute(
+            "SELECT book_id, raw FROM memberships WHERE list_id = ? ORDER BY position", (list_id,)
+        ):
+            if book_id not in seen:
+                item = json.loads(raw)
+                item["_list_name"] = list_name
+                items.append(item)
+        return items
+
+    def prune_lists(self, list_ids: Iterable[str]):
+        """Forget memberships of lists that no longer exist on the account."""
+        keep = list(list_ids)
+        placeholders = ",".join("?" * len(keep))
+        self.conn.execute(f"DELETE FROM memberships WHERE list_id NOT IN ({placeholders})", keep)
+
+    # Books
+
+    def save_books(
+        self,
+        books: Iterable[Book],
+        raw_hashes: Dict[str, str],
+        reviews: Dict[str, Dict[str, Any]],
+    ):
+        """Record parsed books; `raw_hashes` maps book id to content_hash of its raw book payload."""
+        synced_at = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for book in books:
+            review = reviews.get(book.id) or {}
+            rows.append((
+                book.id,
+                book.model_dump_json(),
+                raw_hashes.get(book.id, ""),
+                review.get("updated_at"),
+                synced_at,
+            ))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO books (id, data, raw_hash, review_updated_at, synced_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.conn.commit()